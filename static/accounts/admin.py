@@ -2,6 +2,7 @@ from django.contrib import admin
 from .models import CustomUser
 from django.contrib.auth.admin import UserAdmin
 from .choices import UserTypeChoices
+from .search import search_users
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('email', 'full_name', 'user_type', 'is_active', 'is_staff')
@@ -29,6 +30,9 @@ class CustomUserAdmin(UserAdmin):
         # Students can only see their own user account
         return qs.filter(id=request.user.id)
     
+    def get_search_results(self, request, queryset, search_term):
+        return search_users(queryset, search_term), False
+
     def has_add_permission(self, request):
         return request.user.user_type == UserTypeChoices.ADMIN
     
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .revocation import is_revoked
+from .tokens import ROLE_FIELDS, has_role_claims, roles_revoked, token_user, user_from_fields
+
+
+PASSWORD_DIGEST = 'password_digest'
+
+
+def user_cache_key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def cached_fields(user):
+    """What authentication needs of the user, never the password hash itself."""
+    fields = {field: getattr(user, field) for field in ROLE_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        fields[PASSWORD_DIGEST] = get_md5_hash_password(user.password)
+    return fields
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that does not load the user on every request.
+
+    Tokens issued by accounts.serializers carry the role claims, the user
+    is then built from the token (see accounts.tokens.token_user) unless a
+    role change revoked them. For other tokens the role fields of the loaded
+    user are cached for USER_CACHE_TIMEOUT seconds and the user is rebuilt
+    from them the same way. Saving or deleting a user and role changes
+    made by queryset updates drop the entry (see accounts.signals), the
+    timeout only bounds other changes that bypass signals, such as a
+    password set by a queryset update.
+
+    Logged out tokens are refused, see accounts.revocation.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise InvalidToken(_("Token has been revoked"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        # the password hash check needs the stored user
+        if has_role_claims(validated_token) and not api_settings.CHECK_REVOKE_TOKEN:
+            if roles_revoked(validated_token, user_id):
+                raise AuthenticationFailed(_("The user's roles have changed, refresh the token."), code="roles_changed")
+            if not validated_token['is_active']:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            return token_user(user_id, validated_token)
+
+        key = user_cache_key(user_id)
+        fields = cache.get(key)
+        if fields is None:
+            user = super().get_user(validated_token)
+            cache.set(key, cached_fields(user), settings.USER_CACHE_TIMEOUT)
+            return user
+
+        # the checks JWTAuthentication makes after loading the user
+        if not fields['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != fields.pop(PASSWORD_DIGEST, None):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        else:
+            fields.pop(PASSWORD_DIGEST, None)
+        return user_from_fields(user_id, fields)
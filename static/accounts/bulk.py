@@ -0,0 +1,162 @@
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from rest_framework import serializers
+
+from .choices import UserTypeChoices
+from .models import CustomUser
+from .signals import users_bulk_created
+
+FORMATS = ('csv', 'ndjson')
+
+# errors beyond this are only counted, so the report stays small for huge files
+MAX_REPORTED_ERRORS = 1000
+
+
+class UserImportSerializer(serializers.Serializer):
+    """One imported row. Email uniqueness is checked per batch, not per row."""
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(min_length=8, max_length=128)
+    full_name = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    phone_number = serializers.CharField(max_length=20, required=False, allow_blank=True, allow_null=True)
+    user_type = serializers.ChoiceField(choices=UserTypeChoices.choices, default=UserTypeChoices.STUDENT)
+
+
+def guess_format(name):
+    """'users.csv' to 'csv', None when the extension is not a known format."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension in ('json', 'jsonl'):
+        extension = 'ndjson'
+    return extension if extension in FORMATS else None
+
+
+def read_rows(lines, file_format):
+    """Rows of a CSV (with a header) or NDJSON text stream, one dict at a time."""
+    if file_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else {'__invalid__': line}
+
+
+def setup_worker():
+    # spawned processes (macOS, Windows) start without Django, forked ones already have it
+    django.setup()
+
+
+class UserImporter:
+    """
+    Creates users from rows in batches: validates each row, drops emails
+    that exist or repeat, hashes the passwords of the batch on ``workers``
+    processes and inserts it with one bulk_create. Counts and row errors
+    are collected in ``report()``.
+    """
+
+    def __init__(self, batch_size=1000, workers=1):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.seen = set()
+        self._started = None
+
+    def run(self, rows):
+        self._started = time.perf_counter()
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=setup_worker)
+        try:
+            batch = []
+            for number, row in enumerate(rows, start=1):
+                batch.append((number, row))
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch, executor)
+                    batch = []
+            if batch:
+                self.import_batch(batch, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round((self.created + self.failed) / elapsed, 1) if elapsed else None,
+        }
+
+    def error(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def import_batch(self, batch, executor):
+        valid = []
+        for number, row in batch:
+            serializer = UserImportSerializer(data=row if '__invalid__' not in row else None)
+            if not serializer.is_valid():
+                self.error(number, serializer.errors)
+                continue
+            data = serializer.validated_data
+            data['email'] = CustomUser.objects.normalize_email(data['email'])
+            if data['email'].lower() in self.seen:
+                self.error(number, {'email': ['Repeated in this file.']})
+                continue
+            self.seen.add(data['email'].lower())
+            valid.append((number, data))
+
+        existing = {
+            email.lower()
+            for email in CustomUser.objects.alias(email_lower=Lower('email'))
+            .filter(email_lower__in=[data['email'].lower() for _, data in valid])
+            .values_list('email', flat=True)
+        }
+        rows = []
+        for number, data in valid:
+            if data['email'].lower() in existing:
+                self.error(number, {'email': ['A user with this email already exists.']})
+            else:
+                rows.append((number, data))
+
+        passwords = [data.pop('password') for _, data in rows]
+        if executor is not None:
+            hashes = executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (self.workers * 4)))
+        else:
+            hashes = map(make_password, passwords)
+        users = [(number, CustomUser(password=hashed, **data)) for (number, data), hashed in zip(rows, hashes)]
+        self.insert(users)
+
+    def insert(self, users):
+        try:
+            with transaction.atomic():
+                CustomUser.objects.bulk_create([user for _, user in users])
+        except IntegrityError:
+            # an email was taken meanwhile, find it row by row
+            for number, user in users:
+                try:
+                    with transaction.atomic():
+                        user.save(force_insert=True)
+                    self.created += 1
+                except IntegrityError:
+                    self.error(number, {'email': ['A user with this email already exists.']})
+            return
+
+        self.created += len(users)
+        # bulk_create skips post_save, receivers that track users listen to this instead
+        users_bulk_created.send(sender=CustomUser, users=[user for _, user in users])
@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import forget_user
+from accounts.choices import UserTypeChoices
+from accounts.models import CustomUser
+from accounts.serializers import RoleTokenObtainPairSerializer
+from accounts.tokens import roles_version_key
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and time per authenticated request for plain, cached and role claim tokens (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            admin = CustomUser.objects.create_user(
+                email='jwt-benchmark-admin@example.com', password='jwt-benchmark', user_type=UserTypeChoices.ADMIN
+            )
+            student = CustomUser.objects.create_user(
+                email='jwt-benchmark-student@example.com', password='jwt-benchmark', user_type=UserTypeChoices.STUDENT
+            )
+            endpoints = (
+                ('student profile', student, reverse('customuser-detail', kwargs={'pk': student.id})),
+                ('admin user list', admin, reverse('customuser-list')),
+                ('buffer metrics', admin, reverse('course-view-buffer')),
+            )
+            modes = (
+                # a token without role claims and no cached user is what every request paid before
+                ('before', lambda user: RefreshToken.for_user(user).access_token, True),
+                ('cached user', lambda user: RefreshToken.for_user(user).access_token, False),
+                ('role claims', lambda user: RoleTokenObtainPairSerializer.get_token(user).access_token, False),
+            )
+
+            for name, user, url in endpoints:
+                for mode, make_token, cold in modes:
+                    client = Client(HTTP_AUTHORIZATION=f'Bearer {make_token(user)}')
+                    client.get(url)
+                    queries = 0
+                    started = time.perf_counter()
+                    for _ in range(options['requests']):
+                        if cold:
+                            forget_user(user.id)
+                        with CaptureQueriesContext(connection) as captured:
+                            response = client.get(url)
+                        queries += len(captured)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{name:>18} {mode:>12}: {queries / options['requests']:.1f} queries/request, "
+                        f"{elapsed / options['requests'] * 1000:.2f} ms/request (status {response.status_code})"
+                    )
+
+            transaction.set_rollback(True)
+        for user in (admin, student):
+            forget_user(user.id)
+            cache.delete(roles_version_key(user.id))
@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.choices import UserTypeChoices
+from accounts.models import CustomUser
+from accounts.search import search_users
+
+FIRST_NAMES = 'maria james anna david sofia daniel elena michael olga thomas kim lee chen aziz dilnoza'.split()
+LAST_NAMES = 'lopez smith ivanova brown garcia muller kim park wang karimov yusupova novak rossi'.split()
+DOMAINS = 'example.com school.org mail.uz university.edu company.io'.split()
+
+
+class Command(BaseCommand):
+    help = 'Compare ?search= and email login lookups with icontains and exact matches on generated users (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            emails = self.seed(rng, options['users'])
+            queryset = CustomUser.objects.all()
+            searches = [rng.choice(LAST_NAMES + FIRST_NAMES) + str(rng.randint(0, 99)) for _ in range(options['queries'])]
+            logins = [rng.choice(emails).upper() for _ in range(options['queries'])]
+
+            # both run what a paginated list request runs: a count and the first page
+            def icontains(query):
+                matches = queryset.filter(
+                    Q(email__icontains=query) | Q(full_name__icontains=query) | Q(phone_number__icontains=query)
+                ).order_by('email')
+                return matches.count(), list(matches.values_list('id', flat=True)[:10])
+
+            def indexed(query):
+                matches = search_users(queryset, query)
+                return matches.count(), list(matches.values_list('id', flat=True)[:10])
+
+            def exact(email):
+                return CustomUser.objects.filter(email=email).first()
+
+            def any_case(email):
+                return CustomUser.objects.get_by_natural_key(email)
+
+            for name, lookup, arguments in (
+                ('icontains', icontains, searches),
+                ('search', indexed, searches),
+                ('exact email', exact, logins),
+                ('any case email', any_case, logins),
+            ):
+                started = time.perf_counter()
+                for argument in arguments:
+                    lookup(argument)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{name:>15}: {elapsed / len(arguments) * 1000:.2f} ms/lookup over {len(arguments)} lookups")
+
+            self.stdout.write(search_users(queryset, searches[0]).explain())
+            self.stdout.write(CustomUser.objects.with_email(logins[0]).explain())
+            transaction.set_rollback(True)
+
+    def seed(self, rng, count):
+        password = make_password('user-search-benchmark')
+        emails = []
+        batch = []
+        for number in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'{first}.{last}{number}@{rng.choice(DOMAINS)}'
+            emails.append(email)
+            batch.append(CustomUser(
+                email=email,
+                password=password,
+                full_name=f'{first.title()} {last.title()}',
+                phone_number=f'+998{rng.randint(10**8, 10**9 - 1)}',
+                user_type=UserTypeChoices.STUDENT,
+            ))
+            if len(batch) == 5000:
+                CustomUser.objects.bulk_create(batch)
+                batch = []
+        CustomUser.objects.bulk_create(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE accounts_customuser')
+        return emails
@@ -0,0 +1,33 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bulk import FORMATS, UserImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create users from a CSV (with a header) or NDJSON file of email, password, full_name, phone_number, user_type'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=settings.IMPORT_USERS['BATCH_SIZE'])
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes hashing passwords, defaults to one per CPU')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or guess_format(options['path'])
+        if file_format is None:
+            raise CommandError(f"Cannot tell the format of {options['path']}, pass --format")
+
+        importer = UserImporter(batch_size=options['batch_size'], workers=options['workers'])
+        with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+            report = importer.run(read_rows(stream, file_format))
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"{report['created']} users created, {report['failed']} rows failed "
+            f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+        )
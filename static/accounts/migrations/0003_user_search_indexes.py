@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Must match accounts.search.EMAIL_LOWER and FULL_NAME_LOWER, otherwise the
+# planner cannot use them. text_pattern_ops lets the unique index serve
+# LIKE 'prefix%' as well as equality in any collation.
+POSTGRESQL_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE UNIQUE INDEX IF NOT EXISTS accounts_customuser_email_lower_uniq "
+    "ON accounts_customuser (LOWER(email) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS accounts_customuser_email_trgm "
+    "ON accounts_customuser USING gin (LOWER(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS accounts_customuser_full_name_trgm "
+    "ON accounts_customuser USING gin (LOWER(full_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS accounts_customuser_phone_number_trgm "
+    "ON accounts_customuser USING gin (phone_number gin_trgm_ops)",
+)
+DEFAULT_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS accounts_customuser_email_lower_uniq "
+    "ON accounts_customuser (LOWER(email))",
+)
+DROP_INDEXES = (
+    "DROP INDEX IF EXISTS accounts_customuser_email_lower_uniq",
+    "DROP INDEX IF EXISTS accounts_customuser_email_trgm",
+    "DROP INDEX IF EXISTS accounts_customuser_full_name_trgm",
+    "DROP INDEX IF EXISTS accounts_customuser_phone_number_trgm",
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    emails = {}
+    for email in CustomUser.objects.values_list('email', flat=True).iterator():
+        emails.setdefault(email.lower(), []).append(email)
+    duplicates = [group for group in emails.values() if len(group) > 1]
+    if duplicates:
+        raise RuntimeError(
+            f"Emails differing only in case must be merged before the unique index can be created: {duplicates[:20]}"
+        )
+
+    vendor = schema_editor.connection.vendor
+    for statement in POSTGRESQL_INDEXES if vendor == 'postgresql' else DEFAULT_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for statement in DROP_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='roles_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
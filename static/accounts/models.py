@@ -1,10 +1,32 @@
+import time
+
 from django.db import models
+from django.db.models.functions import Lower
+from django.dispatch import Signal
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 from .choices import UserTypeChoices
 
+# copied from the user into every token, enough for all permission checks
+ROLE_FIELDS = ('user_type', 'is_active', 'is_staff')
+
+# sent with the ``user_ids`` whose roles a queryset update changed, which
+# skips post_save, see accounts.signals
+roles_bulk_changed = Signal()
+
+
+class CustomUserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # role claims of tokens issued before must be refused as after save()
+        if 'roles_version' in kwargs or not set(kwargs) & set(ROLE_FIELDS):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(roles_version=time.time_ns(), **kwargs)
+        roles_bulk_changed.send(sender=self.model, user_ids=user_ids)
+        return updated
+
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     def create_user(self, email, password, user_type, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
@@ -24,8 +46,12 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_active', True)
         return self.create_user(email, password, **extra_fields)
     
+    def with_email(self, email):
+        """Users with ``email`` in any case, served by the Lower(email) unique index."""
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.lower())
+
     def get_by_natural_key(self, email):
-        return self.get(email=email)
+        return self.with_email(email).get()
     
     
 class CustomUser(AbstractBaseUser, PermissionsMixin):
@@ -37,6 +63,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # changed with user_type, is_active or is_staff by save() and update(),
+    # see accounts.tokens.revoke_roles
+    roles_version = models.BigIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = 'email'
     objects = CustomUserManager()
@@ -45,3 +74,12 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.full_name} {self.email} {self.user_type}"
 
+
+class RevokedToken(models.Model):
+    """A logged out token, kept until it expires. See accounts.revocation."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
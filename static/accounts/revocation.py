@@ -0,0 +1,175 @@
+import datetime
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# refresh tokens copy their jti here, access tokens inherit it, so revoking
+# the refresh token revokes every access token issued from it
+SESSION_CLAIM = 'session'
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings sized for ``capacity`` values at a false
+    positive rate of ``error_rate``. Membership tests never miss an added
+    value; a positive only means "maybe", about ``error_rate`` of the
+    values never added test positive too.
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # double hashing: k positions from two 64 bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class RevocationList:
+    """
+    This worker's view of RevokedToken behind a Bloom filter, so checking a
+    token that was never revoked costs no query, only filter positives are
+    looked up in the table.
+
+    The filter is built by the first check. After that a background thread
+    loads the jtis revoked since its last load every REFRESH_INTERVAL
+    seconds and rebuilds the filter from the unexpired rows every
+    REBUILD_INTERVAL so expired ones drop out; requests never wait for
+    either. A logout is refused at once by the worker that recorded it and
+    by every other one within REFRESH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.clear()
+
+    def clear(self):
+        self.filter = None
+        self.rebuilt_at = 0
+        self.loaded_until = None
+
+    def refresh(self):
+        """What the background thread does every REFRESH_INTERVAL seconds."""
+        if self.filter is None:
+            return
+        if time.monotonic() - self.rebuilt_at >= settings.TOKEN_REVOCATION['REBUILD_INTERVAL']:
+            self.rebuild()
+        self.load_new()
+
+    def rebuild(self):
+        config = settings.TOKEN_REVOCATION
+        started = timezone.now()
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True))
+        # leave room to grow until the next rebuild
+        bloom = BloomFilter(max(config['CAPACITY'], 2 * len(jtis)), config['ERROR_RATE'])
+        for jti in jtis:
+            bloom.add(jti)
+        # checks keep using the old filter until here, jtis added to it
+        # meanwhile are in the table and come back with the next load
+        with self._lock:
+            self.filter = bloom
+            self.rebuilt_at = time.monotonic()
+            self.loaded_until = started
+
+    def load_new(self):
+        # rows of transactions still open at the last load commit with an
+        # older created_at, the overlap picks them up, adding twice is harmless
+        started = timezone.now()
+        since = self.loaded_until - datetime.timedelta(seconds=settings.TOKEN_REVOCATION['LOAD_OVERLAP'])
+        jtis = list(RevokedToken.objects.filter(created_at__gte=since, expires_at__gt=started).values_list('jti', flat=True))
+        with self._lock:
+            for jti in jtis:
+                self.filter.add(jti)
+            self.loaded_until = started
+
+    def add(self, jti):
+        with self._lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+    def is_revoked(self, jti):
+        if self.filter is None:
+            with self._start_lock:
+                if self.filter is None:
+                    self.rebuild()
+        self._ensure_refresher()
+        if jti not in self.filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def _ensure_refresher(self):
+        # the list may be created before the server forks its workers
+        interval = settings.TOKEN_REVOCATION['REFRESH_INTERVAL']
+        if not interval or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='token-revocations', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Failed to refresh revoked tokens')
+            finally:
+                close_old_connections()
+
+
+revocations = RevocationList()
+
+
+def revocation_ids(token):
+    """The jtis that revoke ``token``: its own and the one of its session."""
+    ids = [token.get(api_settings.JTI_CLAIM)]
+    if token.get(SESSION_CLAIM):
+        ids.append(token[SESSION_CLAIM])
+    return [jti for jti in ids if jti]
+
+
+def is_revoked(token):
+    return any(revocations.is_revoked(jti) for jti in revocation_ids(token))
+
+
+def revoke(token):
+    """Record the jti of ``token`` until it expires."""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.datetime.fromtimestamp(token['exp'], tz=datetime.timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        pass  # revoked already
+    revocations.add(jti)
@@ -0,0 +1,41 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+# Trigrams need three characters, shorter queries only match email prefixes,
+# which the text_pattern_ops index of migration 0003 serves on PostgreSQL.
+MIN_SUBSTRING_LENGTH = 3
+
+# Must match the expressions of the indexes created in migration 0003,
+# otherwise PostgreSQL falls back to a sequential scan.
+EMAIL_LOWER = Lower('email')
+FULL_NAME_LOWER = Lower('full_name')
+
+
+def search_users(queryset, query):
+    """
+    Restrict ``queryset`` to the users whose email, full name or phone number
+    contain ``query``, ignoring case. Email prefix matches come first, then
+    the other matches by email. On PostgreSQL each condition is served by a
+    pg_trgm GIN index.
+    """
+    query = query.strip().lower()
+    if not query:
+        return queryset
+
+    queryset = queryset.alias(email_lower=EMAIL_LOWER, full_name_lower=FULL_NAME_LOWER)
+    if len(query) < MIN_SUBSTRING_LENGTH:
+        return queryset.filter(email_lower__startswith=query).order_by('email_lower', 'id')
+
+    return (
+        queryset.filter(
+            Q(email_lower__contains=query) |
+            Q(full_name_lower__contains=query) |
+            Q(phone_number__contains=query)
+        )
+        .annotate(prefix_match=Case(
+            When(email_lower__startswith=query, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('prefix_match', 'email_lower', 'id')
+    )
@@ -1,7 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import CustomUser
+from .revocation import SESSION_CLAIM, is_revoked
+from .tokens import ROLE_FIELDS, add_role_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,6 +28,15 @@ class UserSerializer(serializers.ModelSerializer):
                 'email': {'required': True}
             }
         
+    def validate_email(self, value):
+        # emails are unique ignoring case, the database index refuses the rest
+        users = CustomUser.objects.with_email(value)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError(_("A user with this email already exists."))
+        return value
+
     def create(self, validated_data):
         validated_data['password'] = make_password(validated_data['password'])  
 
@@ -32,4 +48,72 @@ class UserSerializer(serializers.ModelSerializer):
             user_type=validated_data['user_type']
         )
 
-        return user
\ No newline at end of file
+        return user
+
+
+class ProfileSerializer(UserSerializer):
+    """The signed-in user's own profile, see UserViewSet.me."""
+
+    class Meta(UserSerializer.Meta):
+        read_only_fields = ['user_type', 'created_at']
+        extra_kwargs = dict(UserSerializer.Meta.extra_kwargs, password={'write_only': True, 'required': False})
+
+    def update(self, instance, validated_data):
+        password = validated_data.pop('password', None)
+        if password:
+            instance.set_password(password)
+        return super().update(instance, validated_data)
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact owner representation embedded with ?expand=owner."""
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'full_name', 'user_type']
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair carrying the role claims of accounts.tokens and the session
+    claim of accounts.revocation, which logout revokes.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[SESSION_CLAIM] = token[api_settings.JTI_CLAIM]
+        return add_role_claims(token, user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that re-reads the user, so a new access token picks up role
+    changes and inactive or deleted users cannot get one.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(data.get('refresh', attrs['refresh']))
+        if is_revoked(refresh):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        user = CustomUser.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).only('id', 'roles_version', *ROLE_FIELDS).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_("No active account found with the given credentials"), code="no_active_account")
+
+        access = refresh.access_token
+        # the copied iat would date the token before a role change
+        access.set_iat()
+        data['access'] = str(add_role_claims(access, user))
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(error.args[0])
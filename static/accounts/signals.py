@@ -0,0 +1,46 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .authentication import forget_user
+from .models import CustomUser, roles_bulk_changed
+from .tokens import ROLE_FIELDS, forget_roles, revoke_roles
+
+# sent with the created ``users`` after a bulk import, which skips post_save
+users_bulk_created = Signal()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_roles(sender, instance, update_fields=None, **kwargs):
+    # login only saves last_login, skip the lookup when no role can change
+    instance._saved_roles = None
+    if instance._state.adding or (update_fields is not None and not set(update_fields) & set(ROLE_FIELDS)):
+        return
+    saved = CustomUser.objects.filter(pk=instance.pk).values_list('roles_version', *ROLE_FIELDS).first()
+    if saved is not None:
+        # a stale instance must not write back the version of revoked roles
+        instance.roles_version, instance._saved_roles = saved[0], saved[1:]
+
+
+@receiver(post_save, sender=CustomUser)
+def revoke_changed_roles(sender, instance, created, **kwargs):
+    saved = getattr(instance, '_saved_roles', None)
+    if not created and saved is not None and saved != tuple(getattr(instance, field) for field in ROLE_FIELDS):
+        instance.roles_version = revoke_roles(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_deleted_roles(sender, instance, **kwargs):
+    forget_roles(instance.pk)
+
+
+@receiver(roles_bulk_changed)
+def forget_bulk_changed_roles(sender, user_ids, **kwargs):
+    for user_id in user_ids:
+        forget_user(user_id)
+        forget_roles(user_id)
@@ -1,5 +1,14 @@
+import io
 import json
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -8,6 +17,11 @@ from datetime import timedelta
 from django.utils import timezone
 from .models import CustomUser
 from .choices import UserTypeChoices
+from .authentication import user_cache_key
+from .revocation import BloomFilter, revocations
+from .models import RevokedToken
+from .throttling import TokenBucket
+from stats.counters import user_count
 
 
 class AccountsTests(TestCase):
@@ -237,3 +251,502 @@ class AccountsTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(CustomUser.objects.filter(id=other_student.id).exists())
 
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='admin123password',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        for email, full_name, phone_number in (
+            ('Maria.Lopez@example.com', 'Maria Lopez', '+15550001'),
+            ('jlo@school.org', 'Jennifer Lopez', '+15550002'),
+            ('kim@example.com', 'Kim Min', '+82100003'),
+        ):
+            CustomUser.objects.create_user(
+                email=email, password='password123', full_name=full_name,
+                phone_number=phone_number, user_type=UserTypeChoices.STUDENT
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def search(self, query):
+        response = self.client.get(reverse('customuser-list'), {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [user['email'] for user in response.data['results']]
+
+    def test_search_email_name_and_phone(self):
+        """Test search matches email, full name and phone number ignoring case, email prefixes first"""
+        self.assertEqual(self.search('LOPEZ'), ['jlo@school.org', 'Maria.Lopez@example.com'])
+        self.assertEqual(self.search('maria.lo'), ['Maria.Lopez@example.com'])
+        self.assertEqual(self.search('8210'), ['kim@example.com'])
+        self.assertEqual(self.search('jlo'), ['jlo@school.org'])
+        self.assertEqual(self.search('example.com')[0], 'admin@example.com')
+
+    def test_short_search_matches_email_prefix(self):
+        """Test queries under three characters only match the start of emails"""
+        self.assertEqual(self.search('K'), ['kim@example.com'])
+        self.assertEqual(self.search('ez'), [])
+
+    def test_login_ignores_email_case(self):
+        """Test login finds the user whatever the case of the email"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'maria.lopez@EXAMPLE.com', 'password': 'password123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_register_refuses_email_in_other_case(self):
+        """Test an email registered in another case is refused"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse('register'), {
+            'email': 'KIM@example.com', 'password': 'password123', 'full_name': 'Kim',
+            'phone_number': '+1', 'user_type': UserTypeChoices.STUDENT
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+
+class MeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'test@example.com',
+            'password': 'test123password'
+        }, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.url = reverse('customuser-me')
+
+    def test_me_single_query(self):
+        """Test the profile of a token with role claims is read with one query"""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'test@example.com')
+        self.assertNotIn('password', response.data)
+
+    def test_me_not_modified(self):
+        """Test a GET with the current ETag gets 304 until the profile changes"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        CustomUser.objects.filter(pk=self.student.pk).update(full_name='Renamed')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_me_patch(self):
+        """Test PATCH updates the own profile and hashes the password but keeps the user type"""
+        response = self.client.patch(self.url, {
+            'full_name': 'New Name', 'password': 'newpassword123', 'user_type': UserTypeChoices.ADMIN
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['full_name'], 'New Name')
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.user_type, UserTypeChoices.STUDENT)
+        self.assertTrue(self.student.check_password('newpassword123'))
+        self.assertEqual(self.client.get(self.url)['ETag'], response['ETag'])
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        token = RefreshToken.for_user(self.student).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('customuser-detail', kwargs={'pk': self.student.id})
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries if 'accounts_customuser' in query['sql']]
+
+    def test_user_cached_between_requests(self):
+        """Test the authenticated user is only loaded by the first request"""
+        self.assertEqual(len(self.user_queries()), 2)
+        self.assertEqual(len(self.user_queries()), 1)
+
+    def test_password_hash_not_cached(self):
+        """Test only the fields authentication needs are cached"""
+        self.user_queries()
+        cached = cache.get(user_cache_key(self.student.id))
+        self.assertEqual(set(cached), {'user_type', 'is_active', 'is_staff'})
+        self.assertNotIn(self.student.password, str(cached))
+
+    def test_save_invalidates_cached_user(self):
+        """Test saving a user drops the cached copy"""
+        self.user_queries()
+        self.student.full_name = 'Renamed User'
+        self.student.save()
+        self.assertEqual(len(self.user_queries()), 2)
+
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_delete_invalidates_cached_user(self):
+        """Test a deleted user cannot authenticate with the cached copy"""
+        self.user_queries()
+        self.student.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RoleTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        self.url = reverse('customuser-detail', kwargs={'pk': self.student.id})
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'test@example.com',
+            'password': 'test123password'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def refresh(self, tokens):
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        if response.status_code == status.HTTP_200_OK:
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response
+
+    def test_tokens_carry_roles(self):
+        """Test issued tokens carry the role claims and authenticate without loading the user"""
+        tokens = self.login()
+        access = RefreshToken(tokens['refresh']).access_token
+        self.assertEqual(access['user_type'], UserTypeChoices.STUDENT)
+        self.assertTrue(access['is_active'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_token_user_passes_owner_checks(self):
+        """Test the token backed user works as an owner and in ownership checks"""
+        self.login()
+        response = self.client.patch(self.url, {'full_name': 'Updated Name'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['full_name'], 'Updated Name')
+
+    def test_role_change_revokes_tokens(self):
+        """Test a role change refuses older tokens until they are refreshed"""
+        tokens = self.login()
+        CustomUser.objects.create_user(email='other@example.com', password='password123', user_type=UserTypeChoices.STUDENT)
+        self.student.user_type = UserTypeChoices.ADMIN
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.refresh(tokens)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(RefreshToken(tokens['refresh']).access_token['user_type'], UserTypeChoices.STUDENT)
+        self.assertEqual(self.client.get(reverse('customuser-list')).data['count'], 2)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_role_change_survives_cache_loss(self):
+        """Test a role change made elsewhere is seen once the cached version is gone"""
+        self.login()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        # another process changed the roles, this one's cache was culled
+        admin = CustomUser.objects.get(pk=self.student.pk)
+        admin.user_type = UserTypeChoices.ADMIN
+        admin.save()
+        cache.clear()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_queryset_update_revokes_tokens(self):
+        """Test a role change made by a queryset update refuses older tokens too"""
+        tokens = self.login()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        CustomUser.objects.filter(pk=self.student.pk).update(full_name='Renamed User')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        CustomUser.objects.filter(pk=self.student.pk).update(user_type=UserTypeChoices.ADMIN)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(tokens).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_stale_instance_keeps_revocation(self):
+        """Test saving an instance loaded before a role change does not restore the old version"""
+        tokens = self.login()
+        stale = CustomUser.objects.get(pk=self.student.pk)
+        self.student.is_staff = True
+        self.student.save()
+        stale.full_name = 'Stale Save'
+        stale.is_staff = True
+        stale.save()
+        cache.clear()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(tokens).status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_cannot_refresh(self):
+        """Test deactivating a user revokes their tokens and refresh fails"""
+        tokens = self.login()
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(tokens).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrelated_save_keeps_tokens(self):
+        """Test saving a user without a role change keeps their tokens valid"""
+        self.login()
+        self.student.full_name = 'Renamed User'
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+
+@override_settings(ACCOUNT_RATE_LIMITS={
+    'CACHE': 'default',
+    'RATES': {'login_ip': '4/minute', 'login_email': '2/minute', 'refresh_ip': '2/minute', 'register_ip': '1/hour'},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        self.url = reverse('token_obtain_pair')
+
+    def login(self, email='test@example.com', password='wrong-password', **extra):
+        return self.client.post(self.url, {'email': email, 'password': password}, format='json', **extra)
+
+    def test_token_bucket_refills(self):
+        """Test the bucket allows a burst of its capacity and refills over the period"""
+        bucket = TokenBucket(cache, 'test-bucket', capacity=2, period=60)
+        self.assertEqual([bucket.consume(now=0), bucket.consume(now=0)], [0, 0])
+        self.assertAlmostEqual(bucket.consume(now=0), 30)
+        self.assertEqual(bucket.consume(now=30), 0)
+
+    def test_email_limited_before_hashing(self):
+        """Test repeated logins for one email get 429 with Retry-After without checking the password"""
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login(email='TEST@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with mock.patch('django.contrib.auth.backends.ModelBackend.authenticate') as authenticate:
+            response = self.login(password='test123password')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        authenticate.assert_not_called()
+
+    def test_ip_limited_across_emails(self):
+        """Test one address trying many emails is limited per IP"""
+        for i in range(4):
+            self.assertEqual(self.login(email=f'user{i}@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login(email='user9@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.login(email='user9@example.com', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_and_register_limited(self):
+        """Test the refresh and register views are limited too"""
+        for expected in (status.HTTP_401_UNAUTHORIZED, status.HTTP_401_UNAUTHORIZED, status.HTTP_429_TOO_MANY_REQUESTS):
+            response = self.client.post(reverse('token_refresh'), {'refresh': 'junk'}, format='json')
+            self.assertEqual(response.status_code, expected)
+
+        data = {'email': 'new@example.com', 'password': 'password123', 'full_name': 'New User',
+                'phone_number': '+123', 'user_type': UserTypeChoices.STUDENT}
+        self.assertEqual(self.client.post(reverse('register'), data, format='json').status_code, status.HTTP_201_CREATED)
+        data['email'] = 'other@example.com'
+        response = self.client.post(reverse('register'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '3600')
+
+
+class LogoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        revocations.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        self.url = reverse('customuser-detail', kwargs={'pk': self.student.id})
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'test@example.com',
+            'password': 'test123password'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def get(self, access):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def logout(self, tokens):
+        return self.client.post(
+            reverse('logout'), {'refresh': tokens['refresh']}, format='json',
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}"
+        )
+
+    def test_bloom_filter(self):
+        """Test the filter finds every added value and few others"""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'added-{i}')
+        self.assertTrue(all(f'added-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_logout_revokes_session(self):
+        """Test logout refuses the refresh token and every access token issued from it"""
+        tokens = self.login()
+        refreshed = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json').data
+        other = self.login()
+
+        self.assertEqual(self.logout(tokens).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get(tokens['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get(refreshed['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get(other['access']).status_code, status.HTTP_200_OK)
+
+    def test_logout_requires_valid_refresh_token(self):
+        """Test logout with a broken refresh token is a bad request"""
+        response = self.client.post(reverse('logout'), {'refresh': 'junk'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_unrevoked_token_checked_without_query(self):
+        """Test tokens missing from the filter are accepted without looking up the table"""
+        tokens = self.login()
+        self.logout(self.login())
+        self.get(tokens['access'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get(tokens['access']).status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if 'revokedtoken' in query['sql']])
+
+    def test_revocation_by_other_worker(self):
+        """Test a revocation recorded elsewhere is refused after the next background load"""
+        tokens = self.login()
+        self.assertEqual(self.get(tokens['access']).status_code, status.HTTP_200_OK)
+        # what another worker's logout leaves behind
+        RevokedToken.objects.create(jti=RefreshToken(tokens['refresh'])['jti'], expires_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(self.get(tokens['access']).status_code, status.HTTP_200_OK)
+        revocations.refresh()
+        self.assertEqual(self.get(tokens['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rebuild_drops_expired_revocations(self):
+        """Test the periodic rebuild keeps unexpired revocations only"""
+        tokens = self.login()
+        self.logout(tokens)
+        RevokedToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        revocations.rebuilt_at = 0
+        revocations.refresh()
+        self.assertNotIn(RefreshToken(tokens['refresh'])['jti'], revocations.filter)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='admin123password',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.student = CustomUser.objects.create_user(
+            email='test@example.com',
+            password='test123password',
+            full_name='Test User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        self.url = reverse('customuser-import-users')
+
+    def upload(self, user, content, name='users.ndjson', **data):
+        self.client.force_authenticate(user=user)
+        data['file'] = SimpleUploadedFile(name, content.encode())
+        return self.client.post(self.url, data, format='multipart')
+
+    def test_import_csv_command(self):
+        """Test the command creates valid rows and reports invalid, repeated and existing ones"""
+        rows = [
+            'email,password,full_name,user_type',
+            'one@example.com,password123,One,student',
+            'two@example.com,password123,Two,admin',
+            'bad-email,password123,Bad,student',
+            'ONE@example.com,password123,Again,student',
+            'test@example.com,password123,Taken,student',
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w') as stream:
+                stream.write('\n'.join(rows) + '\n')
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_users', path, '--workers', '1', '--batch-size', '2', stdout=out, stderr=err)
+
+        self.assertIn('2 users created, 3 rows failed', out.getvalue())
+        self.assertEqual([line.split(':')[0] for line in err.getvalue().splitlines()], ['row 3', 'row 4', 'row 5'])
+        self.assertEqual(CustomUser.objects.get(email='two@example.com').user_type, UserTypeChoices.ADMIN)
+        self.assertEqual(CustomUser.objects.filter(email__iexact='one@example.com').count(), 1)
+        self.assertEqual(user_count(UserTypeChoices.STUDENT), 2)
+        self.assertEqual(user_count(UserTypeChoices.ADMIN), 2)
+
+    def test_imported_users_can_log_in(self):
+        """Test the hashed passwords of imported users work for login"""
+        response = self.upload(self.admin, '{"email": "new@example.com", "password": "password123"}\n')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'email': 'new@example.com', 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_import_endpoint_reports_row_errors(self):
+        """Test broken lines and invalid rows are reported by line without stopping the import"""
+        content = '\n'.join([
+            '{"email": "a@example.com", "password": "password123", "user_type": "student"}',
+            'not json',
+            '{"email": "b@example.com", "password": "short"}',
+            '{"email": "c@example.com", "password": "password123", "user_type": "teacher"}',
+        ])
+        response = self.upload(self.admin, content, name='users.txt', file_format='ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 3))
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('password', response.data['errors'][1]['errors'])
+
+    def test_import_endpoint_admin_only(self):
+        """Test students cannot import and an unknown format is refused"""
+        response = self.upload(self.student, '{"email": "new@example.com", "password": "password123"}\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.upload(self.admin, 'email,password\n', name='users.xlsx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CustomUser.objects.filter(email='new@example.com').exists())
@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'5/minute' to (capacity 5, period 60 seconds)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+class TokenBucket:
+    """
+    Token bucket kept in a Django cache: ``capacity`` requests at once,
+    refilled at ``capacity`` per ``period`` seconds. The read-modify-write
+    is not atomic, so concurrent workers may let a few extra requests
+    through, which is fine for shedding a burst.
+    """
+
+    def __init__(self, cache, key, capacity, period):
+        self.cache = cache
+        self.key = key
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.period = period
+
+    def consume(self, now=None):
+        """Take one token, returns 0 if allowed or the seconds until one is available."""
+        now = time.time() if now is None else now
+        tokens, updated = self.cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+        if tokens < 1:
+            self.cache.set(self.key, (tokens, now), self.period)
+            return (1 - tokens) / self.refill_rate
+        self.cache.set(self.key, (tokens - 1, now), self.period)
+        return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle with one token bucket per identity and the view's
+    ``throttle_scope``, limited by ``ACCOUNT_RATE_LIMITS['RATES']
+    ['<scope>_<kind>']``. Throttles run before the view, so a throttled
+    login or registration never reaches the password hasher.
+    """
+    kind = None
+
+    def get_identity(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rate = settings.ACCOUNT_RATE_LIMITS['RATES'].get(f'{view.throttle_scope}_{self.kind}')
+        identity = self.get_identity(request)
+        if rate is None or not identity:
+            return True
+
+        capacity, period = parse_rate(rate)
+        cache = caches[settings.ACCOUNT_RATE_LIMITS['CACHE']]
+        bucket = TokenBucket(cache, f'accounts:throttle:{view.throttle_scope}:{self.kind}:{identity}', capacity, period)
+        self.wait_seconds = bucket.consume()
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Limits attempts per account whichever addresses they come from."""
+    kind = 'email'
+
+    def get_identity(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hashlib.md5(email.strip().lower().encode()).hexdigest()
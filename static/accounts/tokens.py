@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+
+from .models import ROLE_FIELDS, CustomUser
+
+ROLES_VERSION_CLAIM = 'roles_version'
+
+
+def roles_version_key(user_id):
+    return f'accounts:roles:{user_id}'
+
+
+def current_roles_version(user_id):
+    """
+    CustomUser.roles_version of the user, None once the user is deleted.
+    The stored value is cached for ROLES_CACHE_TIMEOUT seconds, so a change
+    made by another process reaches this one within that time, or at once
+    with a shared cache.
+    """
+    key = roles_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = CustomUser.objects.filter(pk=user_id).values_list('roles_version', flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, settings.ROLES_CACHE_TIMEOUT)
+    return version
+
+
+def revoke_roles(user_id):
+    """
+    Invalidate the role claims of every token issued to the user so far.
+    Tokens carry the roles version current at issue time and are refused
+    once the stored one changes. Returns the new version.
+    """
+    version = time.time_ns()
+    CustomUser.objects.filter(pk=user_id).update(roles_version=version)
+    cache.set(roles_version_key(user_id), version, settings.ROLES_CACHE_TIMEOUT)
+    return version
+
+
+def forget_roles(user_id):
+    """Drop the cached version of a deleted user, their tokens are refused from then on."""
+    cache.delete(roles_version_key(user_id))
+
+
+def add_role_claims(token, user):
+    for field in ROLE_FIELDS:
+        token[field] = getattr(user, field)
+    token[ROLES_VERSION_CLAIM] = user.roles_version
+    # the user was just read, spare the first request the lookup
+    cache.add(roles_version_key(user.pk), user.roles_version, settings.ROLES_CACHE_TIMEOUT)
+    return token
+
+
+def has_role_claims(token):
+    return all(field in token for field in ROLE_FIELDS)
+
+
+def roles_revoked(token, user_id):
+    current = current_roles_version(user_id)
+    return current is None or token.get(ROLES_VERSION_CLAIM, 0) != current
+
+
+def user_from_fields(user_id, fields):
+    """
+    CustomUser built from stored field values without a query. Only the id
+    and ``fields`` are loaded, any other field is fetched on first access,
+    and the instance compares equal to the stored user and works as a
+    foreign key value.
+    """
+    names = ('id',) + tuple(fields)
+    values = [user_id] + list(fields.values())
+    return CustomUser.from_db(router.db_for_read(CustomUser), names, values)
+
+
+def token_user(user_id, token):
+    """CustomUser built from the token claims, see user_from_fields."""
+    return user_from_fields(user_id, {field: token[field] for field in ROLE_FIELDS})
@@ -1,10 +1,9 @@
 from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf.urls.static import static
 
-from .views import UserViewSet, RegisterView
+from .views import UserViewSet, RegisterView, LoginView, RefreshView, LogoutView
 
 
 router = DefaultRouter()
@@ -13,8 +12,9 @@ router.register(r'accounts', UserViewSet)
 
 urlpatterns = [
     # jwt
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/', LoginView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', RefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     path('register/', RegisterView.as_view(), name='register'),
 
     path('', include(router.urls)),
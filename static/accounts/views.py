@@ -1,20 +1,75 @@
-from rest_framework import viewsets
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from rest_framework import generics
 from rest_framework import mixins
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .bulk import FORMATS, UserImporter, guess_format, read_rows
 from .choices import UserTypeChoices
 from .models import CustomUser
-from .serializers import UserSerializer
+from .revocation import revocation_ids, revoke
+from .search import search_users
+from .serializers import LogoutSerializer, ProfileSerializer, UserSerializer
+from .throttling import IPThrottle, EmailThrottle
 
 User = get_user_model()
 
+
+def profile_etag(data):
+    return quote_etag(hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest())
+
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, EmailThrottle)
+    throttle_scope = 'register'
+
+
+class LoginView(TokenObtainPairView):
+    throttle_classes = (IPThrottle, EmailThrottle)
+    throttle_scope = 'login'
+
+
+class RefreshView(TokenRefreshView):
+    throttle_classes = (IPThrottle,)
+    throttle_scope = 'refresh'
+
+
+class LogoutView(generics.GenericAPIView):
+    """
+    Revokes the posted ``refresh`` token and with it every access token
+    issued from it, plus the access token the request is authenticated with.
+    Other workers refuse them within TOKEN_REVOCATION['REFRESH_INTERVAL']
+    seconds, see accounts.revocation.
+    """
+    serializer_class = LogoutSerializer
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data['refresh']
+        revoke(refresh)
+        # an access token from another session or without the session claim
+        # is not covered by the refresh token
+        if request.auth is not None and refresh[api_settings.JTI_CLAIM] not in revocation_ids(request.auth):
+            revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UserViewSet(mixins.RetrieveModelMixin,
@@ -29,7 +84,69 @@ class UserViewSet(mixins.RetrieveModelMixin,
     def get_queryset(self):
         user = self.request.user
         if user.user_type == UserTypeChoices.ADMIN:
-            return CustomUser.objects.all()
+            queryset = CustomUser.objects.all()
         elif user.user_type == UserTypeChoices.STUDENT:
-            return CustomUser.objects.filter(id=user.id)
-        return CustomUser.objects.none()
\ No newline at end of file
+            queryset = CustomUser.objects.filter(id=user.id)
+        else:
+            return CustomUser.objects.none()
+
+        search = self.request.query_params.get('search')
+        if search and self.action == 'list':
+            queryset = search_users(queryset, search)
+        return queryset
+
+    @action(detail=False, methods=['get', 'patch'], serializer_class=ProfileSerializer)
+    def me(self, request):
+        """
+        The signed-in user's profile, with an ETag so polling clients get a
+        304 for an unchanged profile. PATCH updates it.
+        """
+        user = request.user
+        # a user loaded by authentication costs nothing, one built from the
+        # token claims or cached fields (accounts.tokens.user_from_fields)
+        # is read in one query
+        if user.get_deferred_fields():
+            user = CustomUser.objects.get(pk=user.pk)
+
+        if request.method == 'PATCH':
+            serializer = self.get_serializer(user, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        else:
+            serializer = self.get_serializer(user)
+
+        etag = profile_etag(serializer.data)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if request.method == 'GET' and (etag in if_none_match or '*' in if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(serializer.data, headers=headers)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_users(self, request):
+        """
+        Admin-only bulk creation of users from an uploaded CSV or NDJSON
+        ``file``, the format comes from ``file_format`` or the file name.
+        Answers with the created and failed counts and the row errors.
+        """
+        if request.user.user_type != UserTypeChoices.ADMIN:
+            raise PermissionDenied("Only admins can import users!!!")
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload a CSV or NDJSON file.'})
+        if upload.size > settings.IMPORT_USERS['MAX_UPLOAD_SIZE']:
+            raise ValidationError({'file': 'The file is too large, use the import_users command.'})
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            raise ValidationError({'file_format': f"Choose one of {', '.join(FORMATS)}."})
+
+        importer = UserImporter(
+            batch_size=settings.IMPORT_USERS['BATCH_SIZE'], workers=settings.IMPORT_USERS['WORKERS']
+        )
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = importer.run(read_rows(stream, file_format))
+        except UnicodeDecodeError:
+            raise ValidationError({'file': 'The file must be UTF-8 encoded.'})
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['-preferred_date'], name='appointment_preferred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['owner', '-preferred_date'], name='appointment_owner_pref_idx'),
+        ),
+    ]
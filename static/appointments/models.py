@@ -10,6 +10,12 @@ class Appointment(models.Model):
     message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-preferred_date'], name='appointment_preferred_idx'),
+            models.Index(fields=['owner', '-preferred_date'], name='appointment_owner_pref_idx'),
+        ]
+
     def __str__(self):
         return f"Appointment with {self.owner.full_name} on {self.preferred_date} at {self.preferred_time}"
 
@@ -1,8 +1,12 @@
 from rest_framework import serializers
 
+from accounts.serializers import UserSummarySerializer
+from static.serializers import DynamicFieldsMixin
 from .models import Appointment, Consultation
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': (UserSummarySerializer, 'owner')}
+
     class Meta:
         model = Appointment
         fields = ['id', 
@@ -16,7 +20,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
             }
 
 
-class ConsultationSerializer(serializers.ModelSerializer):
+class ConsultationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Consultation
         fields = ['id', 'full_name', 'phone_number', 'created_at']
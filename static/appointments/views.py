@@ -3,11 +3,12 @@ from rest_framework.permissions import AllowAny
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.choices import UserTypeChoices
+from static.views import DynamicFieldsViewMixin
 from .models import Appointment, Consultation
 from .serializers import AppointmentSerializer, ConsultationSerializer
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
     permission_classes = (AllowAny,)
@@ -30,7 +31,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ConsultationViewSet(viewsets.ModelViewSet):
+class ConsultationViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Consultation.objects.all()
     serializer_class = ConsultationSerializer
     permission_classes = (AllowAny,)
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-created_at'], name='blogpost_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['owner', '-created_at'], name='blogpost_owner_created_idx'),
+        ),
+    ]
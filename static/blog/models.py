@@ -9,9 +9,17 @@ class BlogPost(models.Model):
     slug = models.SlugField(unique=True)
     content = models.TextField()
     image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
+    # resized copies of image, see static/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     category = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='blogpost_created_at_idx'),
+            models.Index(fields=['owner', '-created_at'], name='blogpost_owner_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
\ No newline at end of file
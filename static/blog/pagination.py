@@ -0,0 +1,11 @@
+from rest_framework.pagination import PageNumberPagination
+
+from static.pagination import KeysetCursorPagination, SelectablePagination
+
+class BlogPostCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class BlogPostPagination(SelectablePagination):
+    page_number_class = PageNumberPagination
+    cursor_class = BlogPostCursorPagination
@@ -1,8 +1,13 @@
 from rest_framework import serializers
 
+from accounts.serializers import UserSummarySerializer
+from static.serializers import DynamicFieldsMixin, ImageVariantsField
 from .models import BlogPost
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': (UserSummarySerializer, 'owner')}
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = BlogPost
         fields = ['id', 
@@ -11,6 +16,7 @@ class BlogPostSerializer(serializers.ModelSerializer):
                   'title', 
                   'content', 
                   'image', 
+                  'image_variants',
                   'created_at', 
                   'updated_at', 
                   'category']
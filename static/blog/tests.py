@@ -259,3 +259,36 @@ class BlogPostTests(TestCase):
         # Expect unauthorized with invalid token
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_list_blog_posts_cursor_pagination(self):
+        """Test walking the blog feed with keyset cursor pagination"""
+        for i in range(14):
+            BlogPost.objects.create(
+                owner=self.admin,
+                title=f'Blog Post {i}',
+                slug=f'blog-post-{i}',
+                content=f'Content for blog post {i}',
+                category='Technology'
+            )
+
+        url = reverse('blogpost-list')
+        response = self.client.get(url, {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        seen = [p['id'] for p in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [p['id'] for p in response.data['results']]
+
+        expected = list(BlogPost.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_list_blog_posts_fields_and_expand(self):
+        """Test ?fields= without content and ?expand=owner on the blog feed"""
+        url = reverse('blogpost-list')
+        response = self.client.get(url, {'fields': 'id,title,owner', 'expand': 'owner'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post = response.data['results'][0]
+        self.assertEqual(list(post), ['id', 'owner', 'title'])
+        self.assertEqual(post['owner']['full_name'], 'Blog Author')
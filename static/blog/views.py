@@ -2,16 +2,19 @@ from rest_framework import viewsets
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.choices import UserTypeChoices
+from static.views import DynamicFieldsViewMixin
 from .models import BlogPost
 from .serializers import BlogPostSerializer
 from .filters import BlogPostFilter
 from .permissions import AdminPostDeleteOnly
+from .pagination import BlogPostPagination
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostSerializer
     permission_classes = (AdminPostDeleteOnly,)
     filterset_class = BlogPostFilter
+    pagination_class = BlogPostPagination
 
     def get_queryset(self):
         return BlogPost.objects.all().order_by('-created_at')
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-sent_at'], name='contact_sent_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['owner', '-sent_at'], name='contact_owner_sent_at_idx'),
+        ),
+    ]
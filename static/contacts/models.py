@@ -9,5 +9,11 @@ class ContactMessage(models.Model):
     message = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-sent_at'], name='contact_sent_at_idx'),
+            models.Index(fields=['owner', '-sent_at'], name='contact_owner_sent_at_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.owner.full_name} - {self.subject}"
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 
+from accounts.serializers import UserSummarySerializer
+from static.serializers import DynamicFieldsMixin
 from .models import ContactMessage
 
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': (UserSummarySerializer, 'owner')}
+
     class Meta:
         model = ContactMessage
         fields = ['id', 
@@ -3,10 +3,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.choices import UserTypeChoices
+from static.views import DynamicFieldsViewMixin
 from .models import ContactMessage
 from .serializers import ContactMessageSerializer
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = (IsAuthenticated,)
@@ -14,9 +15,9 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.user_type == UserTypeChoices.ADMIN:
-            return ContactMessage.objects.all().order_by('-created_at')
+            return ContactMessage.objects.all().order_by('-sent_at')
         elif user.user_type == UserTypeChoices.STUDENT:
-            return ContactMessage.objects.filter(owner=user).order_by('-created_at')
+            return ContactMessage.objects.filter(owner=user).order_by('-sent_at')
         return ContactMessage.objects.none()
 
     def perform_create(self, serializer):
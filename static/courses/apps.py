@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from static import images
+        from . import checks, signals  # noqa: F401
+        images.register(self.get_model('Course'), 'image', 'image_variants')
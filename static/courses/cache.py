@@ -0,0 +1,50 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from static import metrics
+from .filters import CourseFilter
+
+VERSION_KEY = 'courses:version'
+
+# query params that change the list response, anything else is ignored
+LIST_PARAMS = ('q', 'fields', 'expand', 'page', 'pagination', 'cursor')
+
+
+def get_version():
+    # start from the clock so an evicted version never goes back to a used value
+    cache.add(VERSION_KEY, time.time_ns(), None)
+    return cache.get(VERSION_KEY)
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def cache_key(request, prefix='list'):
+    params = []
+    for name in (*CourseFilter.base_filters, *LIST_PARAMS):
+        value = request.query_params.get(name)
+        if value not in (None, ''):
+            params.append((name, value.strip().lower() if name in ('country', 'category') else value))
+    digest = hashlib.md5(
+        f"{request.scheme}://{request.get_host()}?{urlencode(sorted(params))}".encode()
+    ).hexdigest()
+    return f'courses:{prefix}:{get_version()}:{digest}'
+
+
+def get_cached(key, prefix='list'):
+    data = cache.get(key)
+    # counted in process and served by /metrics, a shared counter would cost cache writes
+    metrics.registry.inc('course_cache_requests_total', {'cache': prefix, 'result': 'miss' if data is None else 'hit'})
+    return data
+
+
+def set_cached(key, data):
+    cache.set(key, data, settings.COURSE_LIST_CACHE_TIMEOUT)
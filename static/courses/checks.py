@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .search import uses_database_search
+
+
+@register()
+def check_search_index(app_configs, **kwargs):
+    # the in-process index of one worker only sees the writes of another
+    # through the refresh thread
+    if uses_database_search() or settings.COURSE_SEARCH_INDEX['REFRESH_INTERVAL']:
+        return []
+    return [Warning(
+        'Course search of each worker misses the courses other workers save.',
+        hint="Set COURSE_SEARCH_INDEX['REFRESH_INTERVAL'] unless the server runs a single worker.",
+        id='courses.W001',
+    )]
@@ -0,0 +1,67 @@
+from django.db.models import Case, CharField, Count, Max, Min, Value, When
+
+from .choices import CourseCategoryChoices
+
+# (label, lowest week, highest week), None means open ended
+DURATION_BUCKETS = (
+    ('1-4', 1, 4),
+    ('5-8', 5, 8),
+    ('9-12', 9, 12),
+    ('13+', 13, None),
+)
+
+
+def duration_bucket():
+    whens = [
+        When(duration_weeks__lte=high, then=Value(label))
+        for label, low, high in DURATION_BUCKETS if high is not None
+    ]
+    return Case(*whens, default=Value(DURATION_BUCKETS[-1][0]), output_field=CharField())
+
+
+def course_facets(queryset):
+    """
+    Count the courses in ``queryset`` per country, category and duration
+    bucket, and find their price range. Everything comes from one GROUP BY
+    over the (country, category, bucket) combinations, which is then rolled
+    up per facet in Python.
+    """
+    rows = (
+        queryset.order_by()
+        .annotate(bucket=duration_bucket())
+        .values('country', 'category', 'bucket')
+        .annotate(count=Count('id'), min_price=Min('price'), max_price=Max('price'))
+    )
+
+    total = 0
+    countries = {}
+    categories = {value: 0 for value in CourseCategoryChoices.values}
+    buckets = {label: 0 for label, low, high in DURATION_BUCKETS}
+    min_price = max_price = None
+    for row in rows:
+        total += row['count']
+        countries[row['country']] = countries.get(row['country'], 0) + row['count']
+        categories[row['category']] = categories.get(row['category'], 0) + row['count']
+        buckets[row['bucket']] += row['count']
+        if min_price is None or row['min_price'] < min_price:
+            min_price = row['min_price']
+        if max_price is None or row['max_price'] > max_price:
+            max_price = row['max_price']
+
+    labels = dict(CourseCategoryChoices.choices)
+    return {
+        'count': total,
+        'country': [
+            {'value': country, 'count': count}
+            for country, count in sorted(countries.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'category': [
+            {'value': category, 'label': labels.get(category, category), 'count': count}
+            for category, count in categories.items()
+        ],
+        'duration_weeks': [
+            {'value': label, 'min': low, 'max': high, 'count': buckets[label]}
+            for label, low, high in DURATION_BUCKETS
+        ],
+        'price': {'min': min_price, 'max': max_price},
+    }
@@ -1,5 +1,8 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+
 from .models import Course
+from .search import search_courses
 
 class CourseFilter(filters.FilterSet):
     country = filters.CharFilter(field_name='country', lookup_expr='iexact')
@@ -11,3 +14,14 @@ class CourseFilter(filters.FilterSet):
     class Meta:
         model = Course
         fields = ['country', 'category', 'duration_weeks']
+
+
+class CourseSearchFilter(BaseFilterBackend):
+    """Full text search over title and description with ``?q=``, ranked by relevance."""
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_courses(queryset, query)
@@ -0,0 +1,96 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.choices import UserTypeChoices
+from accounts.models import CustomUser
+from courses.models import Course
+from courses.search import course_index, search_courses, uses_database_search
+
+WORDS = (
+    'english german french korean chinese language grammar speaking writing reading '
+    'university admission preparation exam ielts toefl sat foundation course intensive '
+    'summer winter evening online campus beginner intermediate advanced business academic '
+    'medicine engineering economics law design art music history science mathematics'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Compare ?q= course search with an icontains scan on generated courses (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = [' '.join(rng.sample(WORDS, 2)) for _ in range(options['queries'])]
+
+        with transaction.atomic():
+            self.seed(rng, options['courses'])
+            queryset = Course.objects.all()
+
+            # both run what a paginated list request runs: a count and the first page
+            def icontains(query):
+                condition = Q()
+                for word in query.split():
+                    condition &= Q(title__icontains=word) | Q(description__icontains=word)
+                matches = queryset.filter(condition)
+                return matches.count(), list(matches.values_list('id', flat=True)[:6])
+
+            def indexed(query):
+                matches = search_courses(queryset, query)
+                return matches.count(), list(matches.values_list('id', flat=True)[:6])
+
+            if not uses_database_search():
+                started = time.perf_counter()
+                course_index.build()
+                self.stdout.write(f"in-process index built in {time.perf_counter() - started:.2f}s")
+
+            for name, search in (('icontains', icontains), ('search', indexed)):
+                started = time.perf_counter()
+                for query in queries:
+                    search(query)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:>10}: {elapsed / len(queries) * 1000:.2f} ms/query over {len(queries)} queries"
+                )
+
+            transaction.set_rollback(True)
+        course_index.reset()
+
+    def seed(self, rng, count):
+        # a long tail of rarer words so terms are about as selective as in real descriptions
+        vocabulary = WORDS + [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 10))) for _ in range(5000)]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+        owner = CustomUser.objects.create_user(
+            email='search-benchmark@example.com',
+            password='search-benchmark',
+            user_type=UserTypeChoices.ADMIN
+        )
+        today = datetime.date.today()
+        Course.objects.bulk_create(
+            (
+                Course(
+                    owner=owner,
+                    title=' '.join(rng.choices(vocabulary, weights, k=4)).title(),
+                    description=' '.join(rng.choices(vocabulary, weights, k=60)),
+                    duration_weeks=rng.randint(1, 30),
+                    price=Decimal(rng.randint(50, 5000)),
+                    country=rng.choice(('Korea', 'China', 'Germany', 'Canada')),
+                    category='language',
+                    start_date=today + datetime.timedelta(days=rng.randint(0, 365)),
+                    image='course_images/benchmark.jpg',
+                )
+                for _ in range(count)
+            ),
+            batch_size=1000,
+        )
+        self.stdout.write(f"seeded {count} courses")
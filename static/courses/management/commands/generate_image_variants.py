@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from static import images
+
+
+class Command(BaseCommand):
+    help = 'Generate missing resized variants for course, blog and testimonial images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_VARIANTS['WORKERS'])
+
+    def handle(self, *args, **options):
+        for model, image_field, variants_field in images.registry:
+            pks = [
+                instance.pk
+                for instance in model.objects.only('pk', image_field, variants_field).iterator()
+                if options['force'] or images.needs_variants(instance, image_field, variants_field)
+            ]
+
+            def run(pk):
+                try:
+                    images.generate(model, pk, image_field, variants_field)
+                    return True
+                except Exception as error:
+                    self.stderr.write(f"{model._meta.label} {pk}: {error}")
+                    return False
+                finally:
+                    if options['workers'] > 1:
+                        close_old_connections()
+
+            if options['workers'] > 1:
+                with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                    done = sum(executor.map(run, pks))
+            else:
+                done = sum(map(run, pks))
+            self.stdout.write(f"{model._meta.label}: {done} of {len(pks)} images processed")
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-start_date'], name='course_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['owner', '-start_date'], name='course_owner_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Upper('country'), name='course_country_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Upper('category'), name='course_category_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# Must match courses.search.SEARCH_VECTOR, otherwise the planner cannot use it.
+CREATE_INDEX = (
+    "CREATE INDEX IF NOT EXISTS courses_course_search_gin ON courses_course "
+    "USING gin (to_tsvector('english'::regconfig, "
+    "COALESCE(title, '') || ' ' || COALESCE(description, '')))"
+)
+DROP_INDEX = "DROP INDEX IF EXISTS courses_course_search_gin"
+
+
+def create_search_index(apps, schema_editor):
+    # full text search only runs in the database on PostgreSQL
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 
 from accounts.models import CustomUser
 from .choices import CourseCategoryChoices
@@ -13,11 +14,23 @@ class Course(models.Model):
     category = models.CharField(max_length=100, choices=CourseCategoryChoices.choices, default=None)
     start_date = models.DateField()
     image = models.ImageField(upload_to='course_images/')
+    # resized copies of image, see static/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    # lets other workers pick up the change, see courses/search.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     # for stats
     requests = models.PositiveIntegerField(default=0)
 
-    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-start_date'], name='course_start_date_idx'),
+            models.Index(fields=['owner', '-start_date'], name='course_owner_start_date_idx'),
+            # CourseFilter uses iexact, which compares UPPER(column)
+            models.Index(Upper('country'), name='course_country_upper_idx'),
+            models.Index(Upper('category'), name='course_category_upper_idx'),
+        ]
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -1,4 +1,20 @@
 from rest_framework.pagination import PageNumberPagination
 
+from static.pagination import KeysetCursorPagination, SelectablePagination
+
 class CoursePagination(PageNumberPagination):
     page_size = 6
+
+
+class CourseCursorPagination(KeysetCursorPagination):
+    page_size = 6
+    ordering = ('-start_date', '-id')
+
+
+class CourseListPagination(SelectablePagination):
+    page_number_class = CoursePagination
+    cursor_class = CourseCursorPagination
+
+    def use_cursor(self, request):
+        # search results are ordered by rank, which has no stable keyset
+        return 'q' not in request.query_params and super().use_cursor(request)
@@ -0,0 +1,341 @@
+import datetime
+import heapq
+import html
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import close_old_connections, connection
+from django.db.models import Expression, F, IntegerField
+from django.utils import timezone
+
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# ranked matches checked against the other filters per query, below the
+# SQLite limit of 999 parameters
+FILTER_CHUNK_SIZE = 500
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in into is it of on or the to with'.split()
+)
+
+# Must match the expression of the courses_course_search_gin index created in
+# migration 0003, otherwise PostgreSQL falls back to a sequential scan.
+SEARCH_VECTOR = SearchVector('title', 'description', config=SEARCH_CONFIG)
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall((text or '').lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def highlight(text, terms, length=200):
+    """
+    Escape ``text`` and wrap the words starting with one of ``terms`` in
+    <mark>. Long text is cut to a window around the first match.
+    """
+    text = text or ''
+    prefixes = tuple(terms)
+    matches = [match for match in TOKEN_RE.finditer(text) if match.group().lower().startswith(prefixes)]
+
+    start = 0
+    if len(text) > length and matches:
+        start = max(0, matches[0].start() - length // 4)
+    end = min(len(text), start + length)
+
+    parts = []
+    position = start
+    for match in matches:
+        if match.start() < position or match.end() > end:
+            continue
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+class InvertedIndex:
+    """
+    In-process inverted index over course titles and descriptions, used when
+    the database has no full text search. Documents are scored with BM25 and
+    title terms count ``title_weight`` times. The index is built from the
+    database on first use and kept current from the Course model signals.
+
+    Each worker holds its own copy. A background thread applies the courses
+    saved by other workers every COURSE_SEARCH_INDEX['REFRESH_INTERVAL']
+    seconds and rebuilds the index every REBUILD_INTERVAL, so courses they
+    deleted drop out of the statistics; until then search_courses filters
+    them out. Searches never wait for either.
+    """
+    k1 = 1.2
+    b = 0.75
+    title_weight = 3
+    cached_results = 128
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._clear()
+
+    def build(self):
+        with self._lock:
+            self._clear()
+            self.loaded_until = timezone.now()
+            for pk, title, description in Course.objects.values_list('id', 'title', 'description').iterator():
+                self._add(pk, title, description)
+            self._built = True
+            self.rebuilt_at = time.monotonic()
+
+    def refresh(self):
+        """What the background thread does every REFRESH_INTERVAL seconds."""
+        if not self._built:
+            return
+        if time.monotonic() - self.rebuilt_at >= settings.COURSE_SEARCH_INDEX['REBUILD_INTERVAL']:
+            self.rebuild()
+        self.load_changed()
+
+    def rebuild(self):
+        fresh = type(self)()
+        fresh.build()
+        # searches keep using the old postings until here, courses saved
+        # meanwhile come back with the next load
+        with self._lock:
+            for name in self._state:
+                setattr(self, name, getattr(fresh, name))
+
+    def load_changed(self):
+        # saves of transactions still open at the last load commit with an
+        # older updated_at, the overlap picks them up, loading twice is harmless
+        started = timezone.now()
+        since = self.loaded_until - datetime.timedelta(seconds=settings.COURSE_SEARCH_INDEX['LOAD_OVERLAP'])
+        courses = list(Course.objects.filter(updated_at__gte=since).values_list('id', 'title', 'description'))
+        with self._lock:
+            for pk, title, description in courses:
+                self._remove(pk)
+                self._add(pk, title, description)
+            self.loaded_until = started
+
+    def update(self, course):
+        with self._lock:
+            if self._built:
+                self._remove(course.pk)
+                self._add(course.pk, course.title, course.description)
+
+    def remove(self, pk):
+        with self._lock:
+            if self._built:
+                self._remove(pk)
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def search(self, query, limit=None):
+        """Return ``(course_id, score)`` pairs, best match first."""
+        terms = frozenset(tokenize(query))
+        with self._lock:
+            if not self._built:
+                self.build()
+            self._ensure_refresher()
+            if not terms or not self._lengths:
+                return []
+            # a paginated request searches twice, once for the count and once for the page
+            if (terms, limit) not in self._results:
+                if len(self._results) >= self.cached_results:
+                    self._results.clear()
+                self._results[terms, limit] = self._score(terms, limit)
+            return self._results[terms, limit]
+
+    def _ensure_refresher(self):
+        # the index may be created before the server forks its workers
+        interval = settings.COURSE_SEARCH_INDEX['REFRESH_INTERVAL']
+        if not interval or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='course-search-index', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Failed to refresh the course search index')
+            finally:
+                close_old_connections()
+
+    def _score(self, terms, limit):
+        documents = len(self._lengths)
+        norms = self._get_norms()
+        scores = defaultdict(float)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            boost = idf * (self.k1 + 1)
+            for pk, frequency in postings.items():
+                scores[pk] += boost * frequency / (frequency + norms[pk])
+
+        key = lambda item: (item[1], item[0])
+        if limit is None:
+            return sorted(scores.items(), key=key, reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=key)
+
+    # everything rebuild() swaps in from the fresh index
+    _state = (
+        '_postings', '_terms', '_lengths', '_total_length', '_norms', '_results',
+        '_built', 'rebuilt_at', 'loaded_until',
+    )
+
+    def _clear(self):
+        self._postings = defaultdict(dict)
+        self._terms = {}
+        self._lengths = {}
+        self._total_length = 0
+        self._norms = None
+        self._results = {}
+        self._built = False
+        self.rebuilt_at = 0
+        self.loaded_until = None
+
+    def _get_norms(self):
+        # BM25 length normalisation, recomputed only after the index changed
+        if self._norms is None:
+            average_length = self._total_length / len(self._lengths)
+            self._norms = {
+                pk: self.k1 * (1 - self.b + self.b * length / average_length)
+                for pk, length in self._lengths.items()
+            }
+        return self._norms
+
+    def _add(self, pk, title, description):
+        frequencies = Counter()
+        for token in tokenize(title):
+            frequencies[token] += self.title_weight
+        frequencies.update(tokenize(description))
+        for term, frequency in frequencies.items():
+            self._postings[term][pk] = frequency
+        self._terms[pk] = list(frequencies)
+        length = sum(frequencies.values())
+        self._lengths[pk] = length
+        self._total_length += length
+        self._norms = None
+        self._results = {}
+
+    def _remove(self, pk):
+        length = self._lengths.pop(pk, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._norms = None
+        self._results = {}
+        for term in self._terms.pop(pk):
+            postings = self._postings[term]
+            del postings[pk]
+            if not postings:
+                del self._postings[term]
+
+
+course_index = InvertedIndex()
+
+
+def uses_database_search():
+    return connection.vendor == 'postgresql'
+
+
+def search_courses(queryset, query):
+    """
+    Restrict ``queryset`` to the courses matching ``query``, best match first.
+    PostgreSQL uses the GIN indexed tsvector, other databases the in-process
+    inverted index.
+    """
+    if uses_database_search():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        weighted_vector = (
+            SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        )
+        return (
+            queryset.annotate(search=SEARCH_VECTOR)
+            .filter(search=search_query)
+            .annotate(rank=SearchRank(weighted_vector, search_query))
+            .order_by('-rank', '-id')
+        )
+
+    # keep only the matches the other filters left before capping, the cap
+    # would otherwise cut matches of the filtered set; best ones are checked
+    # first, a chunk at a time, so an unfiltered search needs a single query
+    limit = settings.COURSE_SEARCH_MAX_RESULTS
+    ids = []
+    for chunk in ranked_chunks(query):
+        allowed = set(queryset.filter(pk__in=chunk).values_list('pk', flat=True))
+        ids += [pk for pk in chunk if pk in allowed]
+        if len(ids) >= limit:
+            ids = ids[:limit]
+            break
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).annotate(rank=Position(ids)).order_by('rank')
+
+
+def ranked_chunks(query):
+    # the full ranking is sorted only when the best chunk is not enough
+    top = [pk for pk, score in course_index.search(query, FILTER_CHUNK_SIZE)]
+    yield top
+    if len(top) < FILTER_CHUNK_SIZE:
+        return
+    rest = [pk for pk, score in course_index.search(query)][FILTER_CHUNK_SIZE:]
+    for start in range(0, len(rest), FILTER_CHUNK_SIZE):
+        yield rest[start:start + FILTER_CHUNK_SIZE]
+
+
+class Position(Expression):
+    """
+    Index of the primary key in ``ids`` as ``CASE pk WHEN ... END``; unlike
+    Case/When it is not resolved once per id.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, ids):
+        super().__init__()
+        self.ids = ids
+        self.pk = F('pk')
+
+    def get_source_expressions(self):
+        return [self.pk]
+
+    def set_source_expressions(self, exprs):
+        self.pk, = exprs
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        clone = self.copy()
+        clone.is_summary = summarize
+        clone.pk = self.pk.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        return clone
+
+    def as_sql(self, compiler, connection):
+        column, params = compiler.compile(self.pk)
+        params = list(params)
+        for position, pk in enumerate(self.ids):
+            params += [pk, position]
+        return f"CASE {column} {' '.join(['WHEN %s THEN %s'] * len(self.ids))} END", params
@@ -1,8 +1,26 @@
+from django.db import models
 from rest_framework import serializers
 
+from accounts.serializers import UserSummarySerializer
+from static.serializers import DynamicFieldsMixin, ImageVariantsField, query_param_set
+from stats.rollups import course_view_counts
 from .models import Course
+from .search import highlight, tokenize
+
+class CourseListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # one grouped query for the view counts of the whole page
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        if self.child.wants_view_count():
+            self.child.view_counts = course_view_counts([course.pk for course in items])
+        return super().to_representation(items)
+
+
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': (UserSummarySerializer, 'owner')}
+    field_sources = {'highlight': ('title', 'description')}
+    image_variants = ImageVariantsField()
 
-class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['id',
@@ -15,7 +33,60 @@ class CourseSerializer(serializers.ModelSerializer):
                   'category', 
                   'start_date', 
                   'requests',
-                  'image',]
+                  'image',
+                  'image_variants',]
         extra_kwargs = {
                 'owner': {'read_only': True}
             }
+        list_serializer_class = CourseListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        query = request.query_params.get('q', '') if request is not None else ''
+        terms = tokenize(query)
+        if terms and self.wants_field('highlight'):
+            data['highlight'] = {
+                'title': highlight(instance.title, terms),
+                'description': highlight(instance.description, terms),
+            }
+        if self.wants_view_count():
+            view_counts = getattr(self, 'view_counts', None) or course_view_counts([instance.pk])
+            data['view_count'] = view_counts.get(instance.pk, 0)
+        return data
+
+    def wants_view_count(self):
+        # ?expand=view_count, not a relation so it is not in expandable_fields
+        request = self.context.get('request')
+        return (
+            self.is_dynamic()
+            and 'view_count' in (query_param_set(request, self.expand_query_param) or ())
+            and self.wants_field('view_count')
+        )
+
+
+class FacetCountSerializer(serializers.Serializer):
+    value = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class CategoryFacetSerializer(FacetCountSerializer):
+    label = serializers.CharField()
+
+
+class DurationFacetSerializer(FacetCountSerializer):
+    min = serializers.IntegerField()
+    max = serializers.IntegerField(allow_null=True)
+
+
+class PriceRangeSerializer(serializers.Serializer):
+    min = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    max = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+
+
+class CourseFacetsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    country = FacetCountSerializer(many=True)
+    category = CategoryFacetSerializer(many=True)
+    duration_weeks = DurationFacetSerializer(many=True)
+    price = PriceRangeSerializer()
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Course
+from .cache import bump_version
+from .search import course_index
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_cache(sender, **kwargs):
+    bump_version()
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, **kwargs):
+    transaction.on_commit(lambda: course_index.update(instance))
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: course_index.remove(pk))
+
@@ -5,13 +5,22 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import Course
+from .checks import check_search_index
+from .search import course_index, search_courses
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from accounts.models import CustomUser
 from accounts.choices import UserTypeChoices
 from decimal import Decimal
 import datetime
 from PIL import Image
 import io
-from unittest import skip
+import os
+from unittest import mock, skip
+import shutil
+import tempfile
+from django.core.management import call_command
+from django.test import override_settings
 
 
 class CourseTests(TestCase):
@@ -326,6 +335,300 @@ class CourseTests(TestCase):
             budget_courses = [c for c in response.data if float(c['price']) <= 100]
             self.assertTrue(len(budget_courses) > 0)
             
+    def test_list_courses_cursor_pagination(self):
+        """Test walking the catalogue with keyset cursor pagination"""
+        # Courses sharing a start date must not be skipped or repeated
+        for i in range(14):
+            Course.objects.create(
+                owner=self.admin,
+                title=f'Course {i}',
+                description=f'Description for course {i}',
+                duration_weeks=4,
+                price=Decimal('100.00'),
+                country='Canada' if i % 2 else 'United States',
+                category='Language',
+                start_date=self.course_start_date
+            )
+
+        url = reverse('course-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'country': 'Canada'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+
+        seen = [c['id'] for c in response.data['results']]
+        pages = 1
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [c['id'] for c in response.data['results']]
+            pages += 1
+
+        expected = list(
+            Course.objects.filter(country='Canada')
+            .order_by('-start_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 2)
+
+        # Go back from the second page of the unfiltered list
+        first = self.client.get(url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [c['id'] for c in previous.data['results']],
+            [c['id'] for c in first.data['results']]
+        )
+
+    def test_list_courses_invalid_cursor(self):
+        """Test an invalid cursor is rejected"""
+        url = reverse('course-list')
+        response = self.client.get(url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_courses_cached(self):
+        """Test repeated list requests are served from the cache until a course changes"""
+        url = reverse('course-list')
+        params = {'country': 'United States', 'page': 1}
+        first = self.client.get(url, params)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        # Same selection with different case hits the cache without touching the database
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {'country': 'united states', 'page': 1})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        self.course.title = 'Renamed Course'
+        self.course.save()
+        third = self.client.get(url, params)
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.data['results'][0]['title'], 'Renamed Course')
+
+        self.course.delete()
+        fourth = self.client.get(url, params)
+        self.assertEqual(fourth['X-Cache'], 'MISS')
+        self.assertEqual(fourth.data['count'], 0)
+
+    def test_course_facets(self):
+        """Test facet counts for the current filter selection come from one query"""
+        for i, (country, weeks, price) in enumerate([
+            ('Canada', 3, '50.00'),
+            ('Canada', 10, '450.00'),
+            ('Germany', 20, '900.00'),
+        ]):
+            Course.objects.create(
+                owner=self.admin,
+                title=f'Course {i}',
+                description='Description',
+                duration_weeks=weeks,
+                price=Decimal(price),
+                country=country,
+                category='preparation',
+                start_date=self.course_start_date
+            )
+
+        url = reverse('course-facets')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response.data['country'][0], {'value': 'Canada', 'count': 2})
+        categories = {c['value']: c['count'] for c in response.data['category']}
+        self.assertEqual(categories['preparation'], 3)
+        self.assertEqual(categories['language'], 0)
+        durations = {d['value']: d['count'] for d in response.data['duration_weeks']}
+        self.assertEqual(durations, {'1-4': 1, '5-8': 1, '9-12': 1, '13+': 1})
+        self.assertEqual(response.data['price'], {'min': '50.00', 'max': '900.00'})
+
+        response = self.client.get(url, {'country': 'canada'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['price'], {'min': '50.00', 'max': '450.00'})
+
+        # Cached until a course changes
+        self.assertEqual(self.client.get(url, {'country': 'canada'})['X-Cache'], 'HIT')
+        Course.objects.filter(country='Canada').first().delete()
+        response = self.client.get(url, {'country': 'canada'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_search_courses(self):
+        """Test ?q= returns ranked, highlighted matches and respects filters"""
+        course_index.reset()
+        Course.objects.create(
+            owner=self.admin,
+            title='Korean Language Intensive',
+            description='Learn Korean grammar and speaking in Seoul.',
+            duration_weeks=12,
+            price=Decimal('500.00'),
+            country='Korea',
+            category='language',
+            start_date=self.course_start_date
+        )
+        Course.objects.create(
+            owner=self.admin,
+            title='University Preparation',
+            description='Admission preparation with some Korean lessons.',
+            duration_weeks=20,
+            price=Decimal('900.00'),
+            country='Korea',
+            category='preparation',
+            start_date=self.course_start_date
+        )
+
+        url = reverse('course-list')
+        response = self.client.get(url, {'q': 'korean'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [c['title'] for c in response.data['results']]
+        # The title match ranks first
+        self.assertEqual(titles, ['Korean Language Intensive', 'University Preparation'])
+        self.assertEqual(
+            response.data['results'][0]['highlight']['title'],
+            '<mark>Korean</mark> Language Intensive'
+        )
+
+        response = self.client.get(url, {'q': 'korean', 'category': 'preparation'})
+        self.assertEqual([c['title'] for c in response.data['results']], ['University Preparation'])
+
+        # the bound on ranked matches applies after the filters
+        with override_settings(COURSE_SEARCH_MAX_RESULTS=1):
+            matches = search_courses(Course.objects.filter(category='preparation'), 'korean')
+            self.assertEqual([course.title for course in matches], ['University Preparation'])
+            # also when the match is past the best chunk of the ranking
+            with mock.patch('courses.search.FILTER_CHUNK_SIZE', 1):
+                matches = search_courses(Course.objects.filter(category='preparation'), 'korean')
+                self.assertEqual([course.title for course in matches], ['University Preparation'])
+
+        response = self.client.get(url, {'q': 'nonexistent'})
+        self.assertEqual(response.data['count'], 0)
+
+        # Plain listing has no highlight
+        response = self.client.get(url)
+        self.assertNotIn('highlight', response.data['results'][0])
+
+    def test_search_index_follows_writes(self):
+        """Test the in-process index is updated from course saves and deletes"""
+        course_index.reset()
+        url = reverse('course-list')
+        self.assertEqual(self.client.get(url, {'q': 'astronomy'}).data['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.description = 'An introduction to astronomy.'
+            self.course.save()
+        self.assertEqual(self.client.get(url, {'q': 'astronomy'}).data['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.delete()
+        self.assertEqual(self.client.get(url, {'q': 'astronomy'}).data['count'], 0)
+
+    def test_search_index_follows_other_workers(self):
+        """Test the refresh applies courses saved by another worker without a full rebuild"""
+        course_index.reset()
+        self.assertFalse(search_courses(Course.objects.all(), 'astronomy').exists())
+
+        # another worker saved a course, this one saw no signal
+        with mock.patch.object(course_index, 'update'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.course.description = 'An introduction to astronomy.'
+                self.course.save()
+        self.assertFalse(search_courses(Course.objects.all(), 'astronomy').exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            course_index.refresh()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"updated_at" >=', queries[0]['sql'])
+        self.assertTrue(search_courses(Course.objects.all(), 'astronomy').exists())
+
+    def test_search_index_refresh_check(self):
+        """Test disabling the index refresh is reported by the system checks"""
+        with override_settings(COURSE_SEARCH_INDEX={'REFRESH_INTERVAL': None, 'LOAD_OVERLAP': 60, 'REBUILD_INTERVAL': 3600}):
+            self.assertEqual([message.id for message in check_search_index(None)], ['courses.W001'])
+        self.assertEqual(check_search_index(None), [])
+
+    def test_list_courses_sparse_fields(self):
+        """Test ?fields= trims the response and the loaded columns"""
+        url = reverse('course-list')
+        response = self.client.get(url, {'fields': 'id,title,price'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title', 'price'])
+
+        queryset = response.renderer_context['view'].paginator.paginator.page.object_list
+        deferred = queryset[0].get_deferred_fields()
+        self.assertIn('description', deferred)
+        self.assertNotIn('title', deferred)
+
+    def test_list_courses_expand_owner(self):
+        """Test ?expand=owner embeds the owner without a query per course"""
+        for i in range(5):
+            owner = CustomUser.objects.create_user(
+                email=f'owner{i}@example.com',
+                password='password123',
+                full_name=f'Owner {i}',
+                user_type=UserTypeChoices.ADMIN
+            )
+            Course.objects.create(
+                owner=owner,
+                title=f'Course {i}',
+                description='Description',
+                duration_weeks=4,
+                price=Decimal('100.00'),
+                country='Canada',
+                category='language',
+                start_date=self.course_start_date
+            )
+
+        url = reverse('course-list')
+        # COUNT and the page query with the owner joined
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'expand': 'owner', 'fields': 'id,title,owner'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        owner = response.data['results'][0]['owner']
+        self.assertEqual(set(owner), {'id', 'full_name', 'user_type'})
+
+        # Writes are unaffected by the read-only parameters
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(self.admin_token.access_token)}')
+        detail = reverse('course-detail', kwargs={'pk': self.course.id})
+        response = self.client.patch(f'{detail}?fields=id', {'title': 'Patched'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Patched')
+        self.assertEqual(response.data['owner'], self.admin.id)
+
+    def test_image_variants_generated_on_upload(self):
+        """Test uploading an image produces resized JPEG and WebP variants"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        variants_settings = {'WIDTHS': [320, 640, 1280], 'QUALITY': 80, 'WORKERS': 1, 'ASYNC': False}
+
+        image = Image.new('RGB', (1000, 500), color='green')
+        img_io = io.BytesIO()
+        image.save(img_io, format='JPEG')
+        data = self.course_data.copy()
+        data['category'] = 'language'
+        data['image'] = SimpleUploadedFile("wide.jpg", img_io.getvalue(), content_type="image/jpeg")
+
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS=variants_settings):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('course-list'), data, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            course = Course.objects.get(pk=response.data['id'])
+            # No upscaling past the 1000px original
+            self.assertEqual(sorted(course.image_variants['jpg']), ['320', '640'])
+            self.assertEqual(sorted(course.image_variants['webp']), ['320', '640'])
+            with Image.open(os.path.join(media_root, course.image_variants['webp']['320'])) as variant:
+                self.assertEqual(variant.format, 'WEBP')
+                self.assertEqual(variant.size, (320, 160))
+
+            response = self.client.get(reverse('course-detail', kwargs={'pk': course.pk}))
+            self.assertTrue(response.data['image_variants']['webp']['640'].startswith('http://testserver/media/'))
+
+            # Backfill regenerates variants that went missing
+            Course.objects.filter(pk=course.pk).update(image_variants={})
+            call_command('generate_image_variants', workers=1, stdout=io.StringIO(), stderr=io.StringIO())
+            course.refresh_from_db()
+            self.assertEqual(sorted(course.image_variants['webp']), ['320', '640'])
+
     def test_token_validation(self):
         """Test with invalid token"""
         self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid_token')
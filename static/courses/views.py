@@ -1,24 +1,66 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.exceptions import PermissionDenied
+from django_filters.rest_framework import DjangoFilterBackend
 
 from accounts.choices import UserTypeChoices
-from .filters import CourseFilter
+from static.views import DynamicFieldsViewMixin
+from .filters import CourseFilter, CourseSearchFilter
 from .models import Course
-from .serializers import CourseSerializer
-from .pagination import CoursePagination
-from stats.models import CourseView
+from .serializers import CourseSerializer, CourseFacetsSerializer
+from .facets import course_facets
+from .pagination import CourseListPagination
+from . import cache
+from stats.models import AnonymousCourseVisitors, CourseView
+from stats.buffer import course_view_buffer
+from stats.trending import trending_courses
+from stats.visitors import get_visitor_id, set_visitor_cookie
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = (AllowAny,)
     filterset_class = CourseFilter
-    pagination_class = CoursePagination
+    filter_backends = [DjangoFilterBackend, CourseSearchFilter]
+    pagination_class = CourseListPagination
 
     def get_queryset(self):
         return Course.objects.all().order_by('-start_date')    
     
+    def list(self, request, *args, **kwargs):
+        # the list is public, so the response only depends on the query params
+        key = cache.cache_key(request)
+        data = cache.get_cached(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = super().list(request, *args, **kwargs)
+        cache.set_cached(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        key = cache.cache_key(request, prefix='facets')
+        data = cache.get_cached(key, prefix='facets')
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        data = CourseFacetsSerializer(course_facets(queryset)).data
+        cache.set_cached(key, data)
+        return Response(data, headers={'X-Cache': 'MISS'})
+
+    @action(detail=False)
+    def trending(self, request):
+        courses = trending_courses(self.filter_queryset(self.get_queryset()), request.query_params.get('limit'))
+        data = self.get_serializer(courses, many=True).data
+        for course, item in zip(courses, data):
+            item['trending_score'] = course.current_trending_score
+        return Response(data)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -31,10 +73,22 @@ class CourseViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         user = request.user
 
-        if not CourseView.objects.filter(user=user, course=instance).exists():
-            instance.requests += 1
-            instance.save()
-
-            CourseView.objects.create(user=user, course_id=instance.id)
+        if user.is_authenticated:
+            if course_view_buffer.enabled:
+                course_view_buffer.add(user.id, instance.id)
+            else:
+                CourseView.objects.record(user, instance)
+            visitor_id = None
+        else:
+            # anonymous visitors are only counted, see stats.hyperloglog
+            visitor_id, is_new = get_visitor_id(request)
+            if course_view_buffer.enabled:
+                course_view_buffer.add_anonymous(visitor_id, instance.id)
+            else:
+                AnonymousCourseVisitors.objects.record(instance.id, visitor_id)
 
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        if visitor_id is not None and is_new:
+            set_visitor_cookie(response, visitor_id)
+        return response
@@ -0,0 +1,128 @@
+import io
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# (model, image field, variants field) of every model with responsive images
+registry = []
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def register(model, image_field, variants_field):
+    """Generate resized variants of ``model.<image_field>`` whenever it changes."""
+    registry.append((model, image_field, variants_field))
+
+    def schedule(sender, instance, raw=False, **kwargs):
+        if raw or not needs_variants(instance, image_field, variants_field):
+            return
+        pk = instance.pk
+        transaction.on_commit(lambda: submit(model, pk, image_field, variants_field))
+
+    post_save.connect(schedule, sender=model, weak=False, dispatch_uid=f'image_variants_{model._meta.label}')
+
+
+def needs_variants(instance, image_field, variants_field):
+    image = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+    return (image.name or '') != variants.get('source', '')
+
+
+def submit(model, pk, image_field, variants_field):
+    if not settings.IMAGE_VARIANTS['ASYNC']:
+        return generate(model, pk, image_field, variants_field)
+
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_VARIANTS['WORKERS'], thread_name_prefix='image-variants'
+                )
+    return _executor.submit(_generate_in_thread, model, pk, image_field, variants_field)
+
+
+def _generate_in_thread(*args):
+    try:
+        return generate(*args)
+    except Exception:
+        logger.exception('Failed to generate image variants for %s', args[:2])
+    finally:
+        close_old_connections()
+
+
+def generate(model, pk, image_field, variants_field):
+    """
+    Write the resized copies of one instance's image and store their paths
+    in ``variants_field`` as ``{"source": name, format: {width: path}}``.
+    Variants of a previous image are removed.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+
+    image = getattr(instance, image_field)
+    old_variants = getattr(instance, variants_field) or {}
+    variants = {'source': image.name or ''}
+    if image.name:
+        with image.open('rb') as source:
+            variants.update(resize(image.storage, image.name, source))
+
+    for path in variant_paths(old_variants) - variant_paths(variants):
+        image.storage.delete(path)
+
+    # update() keeps this out of post_save, so it cannot schedule itself again
+    model.objects.filter(pk=pk, **{image_field: image.name}).update(**{variants_field: variants})
+    return variants
+
+
+def resize(storage, name, source):
+    config = settings.IMAGE_VARIANTS
+    original = Image.open(source)
+    original_format = (original.format or 'JPEG').upper()
+    original = ImageOps.exif_transpose(original)
+
+    directory, filename = posixpath.split(name)
+    stem = os.path.splitext(filename)[0]
+    formats = [(original_format, original_format.lower().replace('jpeg', 'jpg'))]
+    if original_format != 'WEBP':
+        formats.append(('WEBP', 'webp'))
+
+    variants = {}
+    for width in config['WIDTHS']:
+        # never upscale, the original is the largest candidate
+        if width >= original.width:
+            continue
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.LANCZOS)
+        for image_format, extension in formats:
+            frame = resized
+            if image_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            buffer = io.BytesIO()
+            frame.save(buffer, format=image_format, quality=config['QUALITY'], optimize=True)
+
+            path = posixpath.join(directory, 'variants', f'{stem}_{width}w.{extension}')
+            storage.delete(path)
+            path = storage.save(path, ContentFile(buffer.getvalue()))
+            variants.setdefault(extension, {})[str(width)] = path
+    return variants
+
+
+def variant_paths(variants):
+    return {
+        path
+        for key, widths in variants.items() if key != 'source'
+        for path in widths.values()
+    }
@@ -0,0 +1,254 @@
+import atexit
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+
+COUNTERS = {
+    'http_requests_total': 'Requests by route, method and status code',
+    'course_cache_requests_total': 'Course list and facets cache lookups by result',
+}
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency in seconds', LATENCY_BUCKETS),
+    'http_request_db_queries': ('Database queries per request', QUERY_BUCKETS),
+    'http_request_db_seconds': ('Database time per request in seconds', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Response body size in bytes', SIZE_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """
+    In-process counters and fixed-bucket histograms keyed by metric name
+    and a sorted tuple of label pairs. Snapshots are plain JSON so the
+    registries of several workers can be summed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        bounds = HISTOGRAMS[name][1]
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': [0] * len(bounds), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(bounds):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(histogram['buckets']), histogram['sum'], histogram['count']]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+
+def merge(snapshots):
+    """Sum registry snapshots into {'counters': {key: value}, 'histograms': {key: histogram}}."""
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0, 'count': 0})
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], buckets)]
+            merged['sum'] += total
+            merged['count'] += count
+    return {'counters': counters, 'histograms': histograms}
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render(merged):
+    """Prometheus text exposition format 0.0.4 of merged snapshots."""
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (metric, labels), value in sorted(merged['counters'].items()):
+            if metric == name:
+                lines.append(f'{name}{format_labels(labels)} {value}')
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (metric, labels), histogram in sorted(merged['histograms'].items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, histogram['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram["sum"]}')
+            lines.append(f'{name}_count{format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class SnapshotWriter:
+    """
+    Writes this worker's snapshot to ``<directory>/metrics-<pid>-<id>.json``
+    at most every ``interval`` seconds, so /metrics on any worker can sum the
+    files of all of them. The id is new for every process start, so a worker
+    that gets the pid of a stopped one, or shares the directory from another
+    container, never overwrites its file. Files of stopped workers stay,
+    which keeps the summed counters monotonic; clear the directory when the
+    server is deployed.
+    """
+
+    def __init__(self, registry, directory, interval):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._written = 0
+        self._pid = None
+        self._path = None
+
+    @property
+    def path(self):
+        # the writer may be created before the server forks its workers
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._path = os.path.join(self.directory, f'metrics-{self._pid}-{uuid.uuid4().hex}.json')
+        return self._path
+
+    def maybe_write(self):
+        if time.monotonic() - self._written >= self.interval:
+            self.write()
+
+    def write(self):
+        self._written = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as stream:
+            json.dump(self.registry.snapshot(), stream)
+        os.replace(temporary, path)
+
+    def read_all(self):
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.startswith('metrics-') and name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as stream:
+                        snapshots.append(json.load(stream))
+                except (OSError, ValueError):
+                    continue
+        return snapshots
+
+
+registry = MetricsRegistry()
+writer = None
+if settings.METRICS['DIRECTORY']:
+    writer = SnapshotWriter(registry, settings.METRICS['DIRECTORY'], settings.METRICS['WRITE_INTERVAL'])
+    atexit.register(writer.write)
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts queries and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Records latency, database queries and time, response size and status
+    of every request per route (the URL name) and method.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS['ENABLED'] or request.path == settings.METRICS['PATH']:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        labels = {'route': match.view_name if match else '<unmatched>', 'method': request.method}
+        registry.inc('http_requests_total', dict(labels, status=str(response.status_code)))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.observe('http_request_db_queries', labels, timer.queries)
+        registry.observe('http_request_db_seconds', labels, timer.seconds)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+
+        if writer is not None:
+            writer.maybe_write()
+        return response
+
+
+def metrics_allowed(request):
+    """Scrapers send the METRICS['TOKEN'] bearer token, staff signed in to the admin may look too."""
+    token = settings.METRICS['TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    if writer is not None:
+        writer.write()
+        merged = merge(writer.read_all())
+    else:
+        merged = merge([registry.snapshot()])
+    return HttpResponse(render(merged), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,142 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination on a composite (ordering field, id) keyset.
+
+    DRF's CursorPagination only stores the first ordering field in the cursor
+    and falls back to OFFSET for rows sharing that value, which degrades on
+    low-cardinality fields like ``start_date``. Here the cursor position also
+    carries the primary key, so every page is a plain range scan and no COUNT
+    is issued. ``ordering`` must be ``(field, id)`` on a non-null field, both
+    in the same direction.
+    """
+    position_separator = '|'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*[self._reverse(order) for order in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._keyset_filter(current_position, reverse))
+
+        # fetch one extra row to know whether there is a following page
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        field_name = ordering[0].lstrip('-')
+        return f"{getattr(instance, field_name)}{self.position_separator}{instance.pk}"
+
+    def _keyset_filter(self, position, reverse):
+        try:
+            value, pk = position.rsplit(self.position_separator, 1)
+            pk = int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        order = self.ordering[0]
+        order_attr = order.lstrip('-')
+        # Test for: (cursor reversed) XOR (queryset reversed)
+        lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+        return (
+            Q(**{f'{order_attr}__{lookup}': value}) |
+            Q(**{order_attr: value, f'pk__{lookup}': pk})
+        )
+
+    def _reverse(self, order):
+        return order[1:] if order.startswith('-') else '-' + order
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page number pagination by default, keyset cursor pagination when the
+    client asks for it with ``?pagination=cursor`` (or follows a ``cursor``
+    link), so existing page-number clients keep working unchanged.
+    """
+    page_number_class = PageNumberPagination
+    cursor_class = KeysetCursorPagination
+    pagination_query_param = 'pagination'
+
+    def __init__(self):
+        self.paginator = self.page_number_class()
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.pagination_query_param) == 'cursor' or
+                self.cursor_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        return self.paginator.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.paginator.get_schema_operation_parameters(view)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
@@ -0,0 +1,85 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+
+def query_param_set(request, name):
+    """Split a comma separated query parameter into a set, None when absent."""
+    value = request.query_params.get(name) if request is not None else None
+    if not value:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    ModelSerializer mixin for sparse fieldsets on read requests.
+
+    ``?fields=id,title`` limits the output to the listed fields and
+    ``?expand=owner`` swaps a related id for the nested serializer declared
+    in ``expandable_fields``, a mapping of field name to
+    ``(serializer class, select_related path)``. Only the top level
+    serializer of a GET request is affected, writes always see every field.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_dynamic():
+            return fields
+
+        request = self.context['request']
+        for name in self.get_expanded_fields(request):
+            serializer_class, path = self.expandable_fields[name]
+            source = path.replace('__', '.')
+            kwargs = {'source': source} if source != name else {}
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        requested = query_param_set(request, self.fields_query_param)
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+    def is_dynamic(self):
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return False
+        return self.parent is None or (isinstance(self.parent, ListSerializer) and self.parent.parent is None)
+
+    def wants_field(self, name):
+        """Whether ``name`` is part of the response, for fields added in to_representation."""
+        if not self.is_dynamic():
+            return True
+        requested = query_param_set(self.context['request'], self.fields_query_param)
+        return requested is None or name in requested
+
+    @classmethod
+    def get_expanded_fields(cls, request):
+        expand = query_param_set(request, cls.expand_query_param) or set()
+        return sorted(expand & set(cls.expandable_fields))
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only ``{format: {width: url}}`` map of the resized copies made by
+    static.images, ready to be joined into an ``srcset``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        result = {}
+        for image_format, widths in (value or {}).items():
+            if image_format == 'source':
+                continue
+            result[image_format] = {}
+            for width, path in sorted(widths.items(), key=lambda item: int(item[0])):
+                url = default_storage.url(path)
+                result[image_format][width] = request.build_absolute_uri(url) if request is not None else url
+        return result
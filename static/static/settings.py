@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 MIDDLEWARE = [
+    'static.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -105,6 +106,42 @@ DATABASES = {
     }
 }
 
+# Local memory by default, set CACHE_LOCATION to share a file based cache between workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache'
+        if os.getenv("CACHE_LOCATION") else 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.getenv("CACHE_LOCATION", "silkway"),
+    }
+}
+
+# Seconds a cached /courses/ list response is kept, writes to Course invalidate it sooner
+COURSE_LIST_CACHE_TIMEOUT = 300
+
+# Upper bound on ranked ?q= matches when searching with the in-process index,
+# applied after the other filters. PostgreSQL search has no such bound.
+COURSE_SEARCH_MAX_RESULTS = 200
+
+# In-process course search index of databases without full text search, see
+# courses/search.py. Each worker applies the courses other workers saved
+# every REFRESH_INTERVAL seconds, which is how long their search results may
+# lag, and rebuilds its index every REBUILD_INTERVAL. Only a single worker
+# may set REFRESH_INTERVAL to None.
+COURSE_SEARCH_INDEX = {
+    'REFRESH_INTERVAL': 5,
+    'LOAD_OVERLAP': 60,
+    'REBUILD_INTERVAL': 3600,
+}
+
+# Resized copies of uploaded course, blog and testimonial images, see static/images.py
+IMAGE_VARIANTS = {
+    'WIDTHS': [320, 640, 1280],
+    'QUALITY': 80,
+    'WORKERS': 2,
+    # generate in a thread pool after the upload request has committed
+    'ASYNC': True,
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -134,13 +171,114 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Write-behind buffering of course views, see stats/buffer.py
+COURSE_VIEW_BUFFER = {
+    'ENABLED': os.getenv("COURSE_VIEW_BUFFER_ENABLED", "False") == "True",
+    'MAX_SIZE': 10000,
+    'FLUSH_SIZE': 500,
+    'FLUSH_INTERVAL': 5,
+}
+
+# Anonymous course visitors, counted per course and day in HyperLogLog
+# sketches of 2**PRECISION bytes with a 1.04 / sqrt(2**PRECISION) error
+ANONYMOUS_VISITORS = {
+    'PRECISION': 12,
+    'COOKIE_NAME': 'visitor_id',
+    'COOKIE_MAX_AGE': 365 * 24 * 60 * 60,
+    'DEFAULT_DAYS': 30,
+    'MAX_DAYS': 365,
+}
+
+# /course-views/timeseries/, buckets that ended before today are cached
+COURSE_VIEW_TIMESERIES = {
+    'CACHE_TIMEOUT': 24 * 60 * 60,
+    'DEFAULT_DAYS': 30,
+    'MAX_BUCKETS': 366,
+}
+
+# The rollup and trending jobs leave views younger than LAG_SECONDS for the
+# next run, so a view committed late with a lower id is not skipped
+COURSE_VIEW_WATERMARK = {
+    'LAG_SECONDS': 300,
+}
+
+# archive_course_views, raw events older than DAYS are deleted after roll up
+COURSE_VIEW_RETENTION = {
+    'DAYS': 365,
+    'BATCH_SIZE': 5000,
+}
+
+# Request metrics served at PATH in Prometheus format, see static/metrics.py.
+# Only requests with the TOKEN bearer token or from staff signed in to the
+# admin may read them, so without TOKEN scrapers are refused.
+# With several workers point DIRECTORY at a directory they share and clear
+# it on deploy, every worker then reports the sum of all of them.
+METRICS = {
+    'ENABLED': os.getenv("METRICS_ENABLED", "True") == "True",
+    'PATH': '/metrics',
+    'DIRECTORY': os.getenv("METRICS_DIRECTORY") or None,
+    'WRITE_INTERVAL': 5,
+    'TOKEN': os.getenv("METRICS_TOKEN") or None,
+}
+
+# Trending courses, scores halve every HALF_LIFE_HOURS without new views
+TRENDING = {
+    'HALF_LIFE_HOURS': 72,
+    'MIN_SCORE': 0.01,
+    'DEFAULT_LIMIT': 6,
+    'MAX_LIMIT': 50,
+}
+
+# Token bucket limits of the login, refresh and register views per client
+# IP and per email, see accounts/throttling.py. Every worker sees the same
+# buckets only with a shared CACHE, e.g. the file cache of CACHE_LOCATION.
+ACCOUNT_RATE_LIMITS = {
+    'CACHE': 'default',
+    'RATES': {
+        'login_ip': '20/minute',
+        'login_email': '5/minute',
+        'refresh_ip': '60/minute',
+        'register_ip': '10/hour',
+        'register_email': '3/hour',
+    },
+}
+
+# Bulk user imports, see accounts/bulk.py. The endpoint hashes on WORKERS
+# processes, the import_users command defaults to one per CPU.
+IMPORT_USERS = {
+    'BATCH_SIZE': 1000,
+    'WORKERS': int(os.getenv("IMPORT_USERS_WORKERS", "1")),
+    'MAX_UPLOAD_SIZE': 50 * 1024 * 1024,
+}
+
+# Logged out tokens, see accounts/revocation.py. Each worker keeps a Bloom
+# filter of CAPACITY jtis at ERROR_RATE false positives. A background thread
+# loads new logouts every REFRESH_INTERVAL seconds, which is how long other
+# workers may still accept a logged out token, and rebuilds the filter
+# every REBUILD_INTERVAL.
+TOKEN_REVOCATION = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'REFRESH_INTERVAL': 5,
+    'LOAD_OVERLAP': 60,
+    'REBUILD_INTERVAL': 3600,
+}
+
+# Seconds an authenticated user stays cached, see accounts/authentication.py
+USER_CACHE_TIMEOUT = 60
+
+# Seconds a worker trusts its cached roles version of a user, see
+# accounts/tokens.py. Without a shared cache a worker keeps accepting tokens
+# issued before a role change made elsewhere for up to this long.
+ROLES_CACHE_TIMEOUT = 5
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=2), 
     'REFRESH_TOKEN_LIFETIME': timedelta(days=6),
@@ -160,5 +298,7 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.RoleTokenRefreshSerializer',
 }
 
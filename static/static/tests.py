@@ -0,0 +1,257 @@
+import datetime
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accounts.choices import UserTypeChoices
+from appointments.models import Appointment
+from blog.models import BlogPost
+from contacts.models import ContactMessage
+from courses.models import Course
+from testimonials.models import Testimonial
+from . import metrics
+
+
+class ListQueryPlanTests(TestCase):
+    """
+    Seed every list endpoint's table with enough rows for the planner to
+    prefer an index, then EXPLAIN the page query each endpoint runs and fail
+    on a sequential scan of that table.
+    """
+    rows = 5000
+    owners = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type=UserTypeChoices.ADMIN
+        )
+        CustomUser.objects.bulk_create(
+            CustomUser(email=f'student{i}@example.com', user_type=UserTypeChoices.STUDENT)
+            for i in range(cls.owners)
+        )
+        students = list(CustomUser.objects.filter(user_type=UserTypeChoices.STUDENT))
+        cls.student = students[0]
+
+        today = datetime.date.today()
+        now = timezone.now()
+        Course.objects.bulk_create(
+            Course(
+                owner=cls.admin,
+                title=f'Course {i}',
+                description='Description',
+                duration_weeks=i % 30 + 1,
+                price=Decimal('100.00'),
+                country=f'Country {i % 100}',
+                category='language' if i % 2 else 'preparation',
+                start_date=today + datetime.timedelta(days=i % 1000),
+                image='course_images/course.jpg',
+            )
+            for i in range(cls.rows)
+        )
+        BlogPost.objects.bulk_create(
+            BlogPost(owner=cls.admin, title=f'Post {i}', slug=f'post-{i}', content='Content', category='News')
+            for i in range(cls.rows)
+        )
+        Testimonial.objects.bulk_create(
+            Testimonial(
+                owner=students[i % cls.owners],
+                university=f'University {i % 500}',
+                story='Story',
+                photo='testimonials_photos/photo.jpg',
+                country='Korea',
+            )
+            for i in range(cls.rows)
+        )
+        Appointment.objects.bulk_create(
+            Appointment(
+                owner=students[i % cls.owners],
+                preferred_date=today + datetime.timedelta(days=i % 365),
+                preferred_time=datetime.time(10, 0),
+            )
+            for i in range(cls.rows)
+        )
+        ContactMessage.objects.bulk_create(
+            ContactMessage(owner=students[i % cls.owners], subject=f'Subject {i}', message='Message')
+            for i in range(cls.rows)
+        )
+        # auto_now_add ignores explicit values, spread the timestamps afterwards
+        for model, field in ((BlogPost, 'created_at'), (Testimonial, 'created_at'), (ContactMessage, 'sent_at')):
+            for obj in model.objects.only('id'):
+                model.objects.filter(pk=obj.pk).update(**{field: now - datetime.timedelta(minutes=obj.pk)})
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def page_query(self, table, url, user=None, params=None):
+        if user is not None:
+            self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+        ]
+        self.assertTrue(queries, f'no page query on {table} for {url}')
+        return queries[-1]
+
+    def assertNoSequentialScan(self, table, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(self.walk(plan[0]['Plan']))
+                scans = [node for node in nodes if node.get('Relation Name') == table]
+                self.assertFalse(
+                    [node for node in scans if node['Node Type'] == 'Seq Scan'],
+                    f'sequential scan on {table}: {sql}'
+                )
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                details = [row[-1] for row in cursor.fetchall()]
+                self.assertFalse(
+                    [detail for detail in details if re.fullmatch(rf'SCAN (TABLE )?{table}', detail)],
+                    f'sequential scan on {table}: {details}'
+                )
+
+    def walk(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self.walk(child)
+
+    def test_course_list(self):
+        sql = self.page_query('courses_course', reverse('course-list'))
+        self.assertNoSequentialScan('courses_course', sql)
+
+    def test_blogpost_list(self):
+        sql = self.page_query('blog_blogpost', reverse('blogpost-list'))
+        self.assertNoSequentialScan('blog_blogpost', sql)
+
+    def test_testimonial_list_student(self):
+        sql = self.page_query('testimonials_testimonial', reverse('testimonial-list'), self.student)
+        self.assertNoSequentialScan('testimonials_testimonial', sql)
+
+    def test_testimonial_list_admin(self):
+        sql = self.page_query('testimonials_testimonial', reverse('testimonial-list'), self.admin)
+        self.assertNoSequentialScan('testimonials_testimonial', sql)
+
+    def test_appointment_list_student(self):
+        sql = self.page_query('appointments_appointment', reverse('appointment-list'), self.student)
+        self.assertNoSequentialScan('appointments_appointment', sql)
+
+    def test_contact_list_student(self):
+        sql = self.page_query('contacts_contactmessage', reverse('contactmessage-list'), self.student)
+        self.assertNoSequentialScan('contacts_contactmessage', sql)
+
+    def test_iexact_filters(self):
+        # SQLite compiles iexact to LIKE, which cannot use the UPPER() indexes
+        if connection.vendor != 'postgresql':
+            self.skipTest('iexact only uses the UPPER() indexes on PostgreSQL')
+        sql = self.page_query('courses_course', reverse('course-list'), params={'country': 'country 7'})
+        self.assertNoSequentialScan('courses_course', sql)
+        sql = self.page_query(
+            'testimonials_testimonial', reverse('testimonial-list'), self.admin, {'university': 'university 7'}
+        )
+        self.assertNoSequentialScan('testimonials_testimonial', sql)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        metrics.registry.clear()
+
+    def sample(self, text, line):
+        match = re.search('^' + re.escape(line) + r' (\S+)$', text, re.MULTILINE)
+        self.assertIsNotNone(match, f'{line} not in metrics')
+        return float(match.group(1))
+
+    @override_settings(METRICS=dict(settings.METRICS, TOKEN='scrape-token'))
+    def test_requests_recorded(self):
+        """Test a request is counted with its latency, queries and size"""
+        self.client.get(reverse('course-list'))
+        self.client.get(reverse('course-list'))
+        self.client.get('/api/v1/missing/')
+
+        text = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        labels = 'method="GET",route="course-list"'
+        self.assertEqual(self.sample(text, f'http_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.sample(text, 'http_requests_total{method="GET",route="<unmatched>",status="404"}'), 1)
+        self.assertEqual(self.sample(text, f'http_request_duration_seconds_count{{{labels}}}'), 2)
+        self.assertEqual(self.sample(text, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 2)
+        self.assertGreater(self.sample(text, f'http_request_db_queries_sum{{{labels}}}'), 0)
+        self.assertGreater(self.sample(text, f'http_response_size_bytes_sum{{{labels}}}'), 0)
+        self.assertIn('# TYPE http_request_db_seconds histogram', text)
+        self.assertEqual(self.sample(text, 'course_cache_requests_total{cache="list",result="miss"}'), 1)
+        self.assertEqual(self.sample(text, 'course_cache_requests_total{cache="list",result="hit"}'), 1)
+
+    @override_settings(METRICS=dict(settings.METRICS, TOKEN='scrape-token'))
+    def test_token_required(self):
+        """Test a configured token protects the metrics"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_only_without_token(self):
+        """Test without a token only staff signed in to the admin see the metrics"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+        staff = CustomUser.objects.create_user(
+            email='staff@example.com', password='password123', user_type=UserTypeChoices.ADMIN, is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_workers_summed(self):
+        """Test snapshots written by several workers are added up"""
+        directory = tempfile.mkdtemp()
+        for worker, latency in enumerate((0.02, 3)):
+            registry = metrics.MetricsRegistry()
+            registry.inc('http_requests_total', {'route': 'course-list', 'method': 'GET', 'status': '200'})
+            registry.observe('http_request_duration_seconds', {'route': 'course-list', 'method': 'GET'}, latency)
+            writer = metrics.SnapshotWriter(registry, directory, interval=60)
+            with mock.patch('os.getpid', return_value=1000 + worker):
+                writer.write()
+
+        text = metrics.render(metrics.merge(writer.read_all()))
+        labels = 'method="GET",route="course-list"'
+        self.assertEqual(self.sample(text, f'http_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.sample(text, f'http_request_duration_seconds_bucket{{{labels},le="0.025"}}'), 1)
+        self.assertEqual(self.sample(text, f'http_request_duration_seconds_bucket{{{labels},le="5"}}'), 2)
+        self.assertEqual(self.sample(text, f'http_request_duration_seconds_sum{{{labels}}}'), 3.02)
+
+    def test_reused_pid_keeps_files(self):
+        """Test a worker started with the pid of a stopped one leaves its file alone"""
+        directory = tempfile.mkdtemp()
+        for _ in range(2):
+            registry = metrics.MetricsRegistry()
+            registry.inc('http_requests_total', {'route': 'course-list', 'method': 'GET', 'status': '200'})
+            writer = metrics.SnapshotWriter(registry, directory, interval=60)
+            with mock.patch('os.getpid', return_value=1000):
+                writer.write()
+                writer.write()
+
+        self.assertEqual(len(os.listdir(directory)), 2)
+        text = metrics.render(metrics.merge(writer.read_all()))
+        self.assertEqual(self.sample(text, 'http_requests_total{method="GET",route="course-list",status="200"}'), 2)
@@ -1,9 +1,12 @@
+from django.conf import settings
 from rest_framework import permissions
 from django.contrib import admin
 from django.urls import path, include
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from .metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Silkway Global",
@@ -30,6 +33,8 @@ urlpatterns = [
     # swagger
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # prometheus
+    path(settings.METRICS['PATH'].lstrip('/'), metrics_view, name='metrics'),
 
 ]
 
@@ -0,0 +1,63 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+from .serializers import query_param_set
+
+
+class DynamicFieldsViewMixin:
+    """
+    Pushes the ``?fields=`` and ``?expand=`` of a DynamicFieldsMixin
+    serializer down to the queryset: expanded relations are loaded with
+    select_related, and list queries only load the columns the trimmed
+    response needs.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        expandable = getattr(serializer_class, 'expandable_fields', None)
+        if expandable is None:
+            return queryset
+
+        expanded = serializer_class.get_expanded_fields(self.request)
+        for name in expanded:
+            queryset = queryset.select_related(expandable[name][1])
+
+        requested = query_param_set(self.request, serializer_class.fields_query_param)
+        if self.action == 'list' and requested:
+            queryset = queryset.only(*self.get_only_fields(queryset, serializer_class, requested, expanded))
+        return queryset
+
+    def get_only_fields(self, queryset, serializer_class, requested, expanded):
+        model = queryset.model
+        names = {model._meta.pk.name}
+
+        # ordering and keyset pagination read these columns from every row
+        for order in queryset.query.order_by:
+            if isinstance(order, str):
+                names.add(order.lstrip('-'))
+
+        # select_related relations cannot be deferred
+        for name in expanded:
+            related_serializer, path = serializer_class.expandable_fields[name]
+            names.add(path)
+            names.update(f'{path}__{field}' for field in related_serializer.Meta.fields)
+
+        fields = serializer_class().fields
+        for name in requested:
+            if name in fields:
+                names.add(fields[name].source.split('.')[0])
+            else:
+                names.update(getattr(serializer_class, 'field_sources', {}).get(name, ()))
+
+        concrete = set()
+        for name in names:
+            try:
+                model._meta.get_field(name.split('__')[0])
+            except FieldDoesNotExist:
+                continue
+            concrete.add(name)
+        return concrete
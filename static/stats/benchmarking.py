@@ -0,0 +1,70 @@
+import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+from accounts.choices import UserTypeChoices
+from accounts.models import CustomUser
+from courses.models import Course
+from stats.models import CourseView
+
+
+def seed_courses(count):
+    """Create ``count`` courses of a new admin and return their ids."""
+    owner = CustomUser.objects.create_user(
+        email='benchmark@example.com',
+        password='benchmark',
+        user_type=UserTypeChoices.ADMIN
+    )
+    today = datetime.date.today()
+    Course.objects.bulk_create(
+        (
+            Course(
+                owner=owner,
+                title=f'Benchmark course {i}',
+                description='Benchmark course',
+                duration_weeks=8,
+                price=Decimal(100),
+                country='Korea',
+                category='language',
+                start_date=today,
+                image='course_images/benchmark.jpg',
+            )
+            for i in range(count)
+        ),
+        batch_size=1000,
+    )
+    return list(Course.objects.filter(owner=owner).values_list('pk', flat=True))
+
+
+def seed_views(rng, course_ids, count):
+    """Create ``count`` views, each by a new student, spread over the last week."""
+    # every view needs its own user, a user views a course once
+    first_user = (CustomUser.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    CustomUser.objects.bulk_create(
+        (
+            CustomUser(email=f'benchmark-{first_user + i}@example.com', user_type=UserTypeChoices.STUDENT)
+            for i in range(count)
+        ),
+        batch_size=5000,
+    )
+    first_view = (CourseView.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+    CourseView.objects.bulk_create(
+        (
+            CourseView(user_id=user_id, course_id=rng.choice(course_ids))
+            for user_id in CustomUser.objects.filter(pk__gte=first_user).values_list('pk', flat=True).iterator()
+        ),
+        batch_size=5000,
+    )
+
+    # viewed_at is auto_now_add, spread the views over the last week afterwards
+    now = timezone.now()
+    view_ids = list(CourseView.objects.filter(pk__gte=first_view).values_list('pk', flat=True))
+    rng.shuffle(view_ids)
+    hours = 7 * 24
+    for hour in range(hours):
+        bucket = view_ids[hour::hours]
+        for offset in range(0, len(bucket), 500):
+            CourseView.objects.filter(pk__in=bucket[offset:offset + 500]).update(
+                viewed_at=now - datetime.timedelta(hours=hour)
+            )
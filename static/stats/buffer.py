@@ -0,0 +1,230 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from courses.models import Course
+from .hyperloglog import HyperLogLog
+from .models import AnonymousCourseVisitors, CourseView
+
+logger = logging.getLogger(__name__)
+
+# rows per INSERT ... RETURNING statement, three parameters each
+INSERT_BATCH_SIZE = 300
+
+
+def supports_insert_returning():
+    """Whether INSERT ... ON CONFLICT DO NOTHING RETURNING works on the database."""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        import sqlite3
+        return sqlite3.sqlite_version_info >= (3, 35)
+    return False
+
+
+class CourseViewBuffer:
+    """
+    Per-worker write-behind buffer for course view events.
+
+    Views are queued in memory and written in batches by a background thread,
+    either every ``flush_interval`` seconds or as soon as ``flush_size``
+    events are waiting. When the queue holds ``max_size`` events new ones are
+    dropped and counted instead of blocking the request.
+
+    Anonymous visitors go into one in-memory HyperLogLog sketch per course
+    and day, which stays the same size however many visitors it sees and is
+    merged into the stored sketch on flush.
+    """
+
+    def __init__(self, enabled=False, max_size=10000, flush_size=500, flush_interval=5.0):
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sketches = {}
+        self._sketch_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._metrics_lock = threading.Lock()
+
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    @classmethod
+    def from_settings(cls):
+        config = getattr(settings, 'COURSE_VIEW_BUFFER', {})
+        return cls(
+            enabled=config.get('ENABLED', False),
+            max_size=config.get('MAX_SIZE', 10000),
+            flush_size=config.get('FLUSH_SIZE', 500),
+            flush_interval=config.get('FLUSH_INTERVAL', 5.0),
+        )
+
+    def add(self, user_id, course_id):
+        self._ensure_flusher()
+        try:
+            self._queue.put_nowait((user_id, course_id))
+        except queue.Full:
+            self._count_dropped(1)
+            return False
+
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def add_anonymous(self, visitor_id, course_id):
+        self._ensure_flusher()
+        key = (course_id, timezone.localdate())
+        with self._sketch_lock:
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = HyperLogLog(settings.ANONYMOUS_VISITORS['PRECISION'])
+            sketch.add(visitor_id)
+        return True
+
+    def flush(self):
+        """Write every queued event and return the number of new CourseView rows."""
+        with self._flush_lock:
+            self._write_sketches()
+            events = []
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not events:
+                return 0
+
+            try:
+                created = self._write(events)
+            except Exception:
+                self._count_dropped(len(events))
+                raise
+            self.flushes += 1
+            self.flushed += len(events)
+            return created
+
+    def _count_dropped(self, count):
+        # request threads and the flusher both drop events
+        with self._metrics_lock:
+            self.dropped += count
+
+    def metrics(self):
+        return {
+            'enabled': self.enabled,
+            'queue_depth': self._queue.qsize(),
+            'pending_sketches': len(self._sketches),
+            'queue_max_size': self._queue.maxsize,
+            'dropped': self.dropped,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+        }
+
+    def _write_sketches(self):
+        with self._sketch_lock:
+            sketches, self._sketches = self._sketches, {}
+        for (course_id, day), sketch in sketches.items():
+            try:
+                AnonymousCourseVisitors.objects.merge(course_id, day, sketch)
+            except Exception:
+                logger.exception('Failed to write anonymous visitors of course %s', course_id)
+
+    def _write(self, events):
+        pairs = set(events)
+        user_ids = {user_id for user_id, _ in pairs}
+        course_ids = {course_id for _, course_id in pairs}
+
+        with transaction.atomic():
+            existing = set(
+                CourseView.objects
+                .filter(user_id__in=user_ids, course_id__in=course_ids)
+                .values_list('user_id', 'course_id')
+            )
+            # another worker or CourseViewManager.record may insert a pair
+            # meanwhile, only the rows inserted here are counted
+            inserted = self._insert(sorted(pairs - existing))
+
+            # one UPDATE per distinct increment instead of one per course
+            increments = Counter(inserted)
+            by_amount = defaultdict(list)
+            for course_id, amount in increments.items():
+                by_amount[amount].append(course_id)
+            for amount, ids in by_amount.items():
+                Course.objects.filter(pk__in=ids).update(requests=F('requests') + amount)
+
+        return len(inserted)
+
+    def _insert(self, pairs):
+        """Insert (user_id, course_id) pairs, returns the course ids of the rows actually inserted."""
+        if not pairs:
+            return []
+        if not supports_insert_returning():
+            inserted = []
+            for user_id, course_id in pairs:
+                try:
+                    with transaction.atomic():
+                        CourseView.objects.create(user_id=user_id, course_id=course_id)
+                except IntegrityError:
+                    continue
+                inserted.append(course_id)
+            return inserted
+
+        quote = connection.ops.quote_name
+        fields = [CourseView._meta.get_field(name) for name in ('user', 'course', 'viewed_at')]
+        user_column, course_column, viewed_column = (quote(field.column) for field in fields)
+        viewed_at = fields[2].get_db_prep_value(timezone.now(), connection)
+        inserted = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(pairs), INSERT_BATCH_SIZE):
+                batch = pairs[start:start + INSERT_BATCH_SIZE]
+                cursor.execute(
+                    f"INSERT INTO {quote(CourseView._meta.db_table)} ({user_column}, {course_column}, {viewed_column}) "
+                    f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                    f"ON CONFLICT ({user_column}, {course_column}) DO NOTHING RETURNING {course_column}",
+                    [value for user_id, course_id in batch for value in (user_id, course_id, viewed_at)],
+                )
+                inserted += [course_id for course_id, in cursor.fetchall()]
+        return inserted
+
+    def _ensure_flusher(self):
+        # the buffer may be created before the server forks its workers
+        if self.flush_interval is None or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='course-view-buffer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush course view buffer')
+            finally:
+                close_old_connections()
+
+
+course_view_buffer = CourseViewBuffer.from_settings()
+
+
+@atexit.register
+def _drain_on_shutdown():
+    if course_view_buffer.enabled:
+        course_view_buffer.flush()
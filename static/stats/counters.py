@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from accounts.models import CustomUser
+from .models import UserTypeCount
+
+
+def adjust_user_count(user_type, delta):
+    updated = UserTypeCount.objects.filter(user_type=user_type).update(count=F('count') + delta)
+    if not updated:
+        # first user of this type, the row is seeded by the migration otherwise
+        UserTypeCount.objects.get_or_create(user_type=user_type)
+        UserTypeCount.objects.filter(user_type=user_type).update(count=F('count') + delta)
+
+
+def user_count(user_type):
+    return UserTypeCount.objects.filter(user_type=user_type).values_list('count', flat=True).first() or 0
+
+
+def reconcile_user_counts():
+    """
+    Recount users per type and correct the stored counters, which drift when
+    users are changed without signals (bulk_create, queryset update, raw SQL).
+    Returns {user_type: (stored, actual)} for the counters that were wrong.
+    """
+    with transaction.atomic():
+        # locking the counters waits for in-flight signups, so the recount sees them
+        stored = {row.user_type: row.count for row in UserTypeCount.objects.select_for_update()}
+        actual = dict(CustomUser.objects.values_list('user_type').annotate(count=Count('id')).order_by())
+
+        drift = {}
+        for user_type in set(stored) | set(actual):
+            if stored.get(user_type, 0) != actual.get(user_type, 0):
+                drift[user_type] = (stored.get(user_type, 0), actual.get(user_type, 0))
+                UserTypeCount.objects.update_or_create(
+                    user_type=user_type, defaults={'count': actual.get(user_type, 0)}
+                )
+    return drift
@@ -0,0 +1,79 @@
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import CourseView
+
+COLUMNS = ('id', 'user_id', 'course_id', 'viewed_at')
+JOINED_COLUMNS = COLUMNS + ('course_title', 'user_email')
+SOURCES = {'course_title': 'course__title', 'user_email': 'user__email'}
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_day(value):
+    """YYYY-MM-DD to a date, None for an empty value, ValueError otherwise."""
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'{value!r} is not a YYYY-MM-DD date')
+    return day
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def export_rows(start=None, end=None, join=False, chunk_size=2000):
+    """
+    Stream CourseView rows as tuples of ``columns``, oldest first, for the
+    days ``start`` to ``end`` inclusive. Rows come through iterator(), a
+    server-side cursor on PostgreSQL, so memory does not depend on the
+    number of rows. Returns (columns, rows).
+    """
+    columns = JOINED_COLUMNS if join else COLUMNS
+    views = CourseView.objects.all()
+    if start is not None:
+        views = views.filter(viewed_at__gte=day_start(start))
+    if end is not None:
+        views = views.filter(viewed_at__lt=day_start(end + datetime.timedelta(days=1)))
+    rows = views.order_by('id').values_list(*(SOURCES.get(column, column) for column in columns))
+    return columns, rows.iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+        )
+
+
+def render_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(
+            {
+                column: value.isoformat() if isinstance(value, datetime.datetime) else value
+                for column, value in zip(columns, row)
+            },
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def render(export_format, columns, rows):
+    renderer = render_csv if export_format == 'csv' else render_ndjson
+    return renderer(columns, rows)
@@ -0,0 +1,25 @@
+import gzip
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from stats.retention import archive_course_views
+
+
+class Command(BaseCommand):
+    help = 'Delete course view events past the retention period, their counts stay in the daily rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.COURSE_VIEW_RETENTION['DAYS'])
+        parser.add_argument('--batch-size', type=int, default=settings.COURSE_VIEW_RETENTION['BATCH_SIZE'])
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches')
+        parser.add_argument('--dump', help='Also append the deleted events to this gzipped NDJSON file')
+
+    def handle(self, *args, **options):
+        kwargs = {'days': options['days'], 'batch_size': options['batch_size'], 'pause': options['pause']}
+        if options['dump']:
+            with gzip.open(options['dump'], 'at', encoding='utf-8') as dump:
+                deleted = archive_course_views(dump=dump, **kwargs)
+        else:
+            deleted = archive_course_views(**kwargs)
+        self.stdout.write(f"{deleted} course views archived")
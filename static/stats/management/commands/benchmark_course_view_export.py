@@ -0,0 +1,47 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stats.benchmarking import seed_courses, seed_views
+from stats.export import CONTENT_TYPES, export_rows, render
+
+
+class Command(BaseCommand):
+    help = 'Measure course view export throughput and memory on generated views (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--views', type=int, default=200000)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            seed_views(rng, seed_courses(options['courses']), options['views'])
+
+            for output in CONTENT_TYPES:
+                for join in (False, True):
+                    started = time.perf_counter()
+                    size = self.export(output, join, options['chunk_size'])
+                    elapsed = time.perf_counter() - started
+
+                    # tracing slows the export down, so memory gets its own run
+                    tracemalloc.start()
+                    self.export(output, join, options['chunk_size'])
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f"{output:>6}{' joined' if join else '':>7}: {options['views'] / elapsed:,.0f} rows/s, "
+                        f"{size / 1e6:.1f} MB written, peak memory {peak / 1e6:.1f} MB"
+                    )
+
+            transaction.set_rollback(True)
+
+    def export(self, output, join, chunk_size):
+        columns, rows = export_rows(join=join, chunk_size=chunk_size)
+        return sum(len(line) for line in render(output, columns, rows))
@@ -0,0 +1,62 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from courses.models import Course
+from stats.benchmarking import seed_courses, seed_views
+from stats.models import CourseView
+from stats.trending import trending_courses, update_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Compare trending reads from precomputed scores with a live GROUP BY as views grow (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=500)
+        parser.add_argument('--steps', type=int, nargs='+', default=[10000, 100000, 500000])
+        parser.add_argument('--reads', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            course_ids = seed_courses(options['courses'])
+            total = 0
+            for step in options['steps']:
+                seed_views(rng, course_ids, step - total)
+                self.stdout.write(f"seeded {step - total} views")
+                total = step
+
+                started = time.perf_counter()
+                update_trending_scores()
+                updated = time.perf_counter() - started
+
+                since = timezone.now() - datetime.timedelta(days=7)
+
+                def live():
+                    return list(
+                        CourseView.objects.filter(viewed_at__gte=since)
+                        .values('course').annotate(views=Count('id')).order_by('-views')[:6]
+                    )
+
+                def precomputed():
+                    return trending_courses(Course.objects.all())
+
+                timings = []
+                for read in (live, precomputed):
+                    started = time.perf_counter()
+                    for _ in range(options['reads']):
+                        read()
+                    timings.append((time.perf_counter() - started) / options['reads'] * 1000)
+                self.stdout.write(
+                    f"{total:>9} views: live {timings[0]:.2f} ms, precomputed {timings[1]:.2f} ms, "
+                    f"incremental update {updated:.2f}s"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.export import CONTENT_TYPES, export_rows, parse_day, render
+
+
+class Command(BaseCommand):
+    help = 'Stream course view events as NDJSON or CSV to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=list(CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--start', help='First day to export, YYYY-MM-DD')
+        parser.add_argument('--end', help='Last day to export, YYYY-MM-DD')
+        parser.add_argument('--join', action='store_true', help='Add the course title and user email')
+        parser.add_argument('--file', help='Write to this file instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            days = {name: parse_day(options[name]) for name in ('start', 'end')}
+        except ValueError as error:
+            raise CommandError(error)
+
+        columns, rows = export_rows(join=options['join'], chunk_size=options['chunk_size'], **days)
+        started = time.perf_counter()
+        count = self.write(render(options['output'], columns, rows), options['file'])
+        if options['output'] == 'csv':
+            count -= 1  # header
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f"{count} course views exported in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+
+    def write(self, lines, path):
+        count = 0
+        if path:
+            with open(path, 'w', newline='', encoding='utf-8') as stream:
+                for line in lines:
+                    stream.write(line)
+                    count += 1
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+                count += 1
+        return count
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from stats.counters import reconcile_user_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount users per user type and correct the stored counters'
+
+    def handle(self, *args, **options):
+        drift = reconcile_user_counts()
+        for user_type, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{user_type}: {stored} -> {actual}")
+        self.stdout.write(f"{len(drift)} counters corrected")
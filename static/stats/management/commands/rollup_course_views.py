@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from stats.rollups import rollup_course_views
+
+
+class Command(BaseCommand):
+    help = 'Roll course views recorded since the last run up into daily per course counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        processed = rollup_course_views(batch_size=options['batch_size'])
+        self.stdout.write(f"{processed} course views rolled up")
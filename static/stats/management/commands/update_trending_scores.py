@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from stats.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = 'Decay trending course scores and fold in course views recorded since the last run'
+
+    def handle(self, *args, **options):
+        processed = update_trending_scores()
+        self.stdout.write(f"{processed} course views processed")
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_image_variants'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseTrendingScore',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='courses.course')),
+                ('score', models.FloatField(default=0)),
+                ('scored_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Watermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='coursetrendingscore',
+            index=models.Index(fields=['-score'], name='trending_score_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_image_variants'),
+        ('stats', '0002_trending_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='courses.course')),
+            ],
+            options={
+                'unique_together': {('course', 'day')},
+            },
+        ),
+    ]
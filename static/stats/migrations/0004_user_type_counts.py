@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_user_type_counts(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    UserTypeCount = apps.get_model('stats', 'UserTypeCount')
+    counts = CustomUser.objects.values_list('user_type').annotate(count=Count('id')).order_by()
+    UserTypeCount.objects.bulk_create(UserTypeCount(user_type=user_type, count=count) for user_type, count in counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('stats', '0003_course_view_daily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTypeCount',
+            fields=[
+                ('user_type', models.CharField(choices=[('student', 'Student'), ('admin', 'Admin'), ('partner', 'Partner')], max_length=10, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_user_type_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_image_variants'),
+        ('stats', '0004_user_type_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnonymousCourseVisitors',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sketch', models.BinaryField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anonymous_visitors', to='courses.course')),
+            ],
+            options={
+                'unique_together': {('course', 'day')},
+            },
+        ),
+    ]
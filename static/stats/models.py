@@ -1,15 +1,165 @@
-from django.db import models
+import datetime
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Course
 from accounts.models import CustomUser
+from accounts.choices import UserTypeChoices
+from .hyperloglog import HyperLogLog
+
+
+class CourseViewManager(models.Manager):
+    def record(self, user, course):
+        """
+        Record that ``user`` viewed ``course`` and bump ``Course.requests``
+        the first time it happens. The insert relies on the (user, course)
+        unique constraint instead of a prior exists() check, and the counter
+        is incremented in the database, so concurrent requests neither lose
+        increments nor raise IntegrityError. Returns True if the view is new.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.create(user=user, course=course)
+            except IntegrityError:
+                return False
+
+            Course.objects.filter(pk=course.pk).update(requests=F('requests') + 1)
+
+        # keep the already loaded instance in sync without re-reading the row
+        course.requests += 1
+        return True
+
 
 class CourseView(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     viewed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CourseViewManager()
+
     class Meta:
         unique_together = ('user', 'course')
 
     def __str__(self):  
-        return f"{self.user.username} viewed {self.course.id} at {self.viewed_at}"
\ No newline at end of file
+        return f"{self.user.username} viewed {self.course.id} at {self.viewed_at}"
+
+
+class Watermark(models.Model):
+    """Last CourseView processed by an incremental stats job."""
+    name = models.CharField(max_length=100, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} at {self.last_id}"
+
+
+def settled_views(events, now=None):
+    """
+    The CourseView ``events`` a watermark may move past: those before the
+    first one younger than COURSE_VIEW_WATERMARK['LAG_SECONDS'].
+
+    Ids are handed out before commit, so an event may become visible after
+    one with a higher id. Stopping at the recent ones leaves transactions
+    that long to commit before the watermark passes their ids.
+    """
+    cutoff = (now or timezone.now()) - datetime.timedelta(seconds=settings.COURSE_VIEW_WATERMARK['LAG_SECONDS'])
+    first_recent = events.filter(viewed_at__gt=cutoff).order_by('id').values_list('id', flat=True).first()
+    if first_recent is not None:
+        events = events.filter(id__lt=first_recent)
+    return events
+
+
+class CourseTrendingScore(models.Model):
+    """Exponentially time-decayed view score of a course as of ``scored_at``."""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='trending_score')
+    score = models.FloatField(default=0)
+    scored_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} scored {self.score} at {self.scored_at}"
+
+
+class CourseViewDaily(models.Model):
+    """CourseView events of one course and day, rolled up by ``rollup_course_views``."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_views')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'day')
+
+    def __str__(self):
+        return f"{self.course_id} had {self.views} views on {self.day}"
+
+
+class UserTypeCount(models.Model):
+    """Number of users of each type, kept up to date by stats.signals."""
+    user_type = models.CharField(max_length=10, choices=UserTypeChoices.choices, primary_key=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.count} {self.user_type} users"
+
+
+class AnonymousCourseVisitorsManager(models.Manager):
+    def record(self, course_id, visitor_id, day=None):
+        """Add ``visitor_id`` to the sketch of ``course_id`` for ``day`` (today by default)."""
+        sketch = HyperLogLog(settings.ANONYMOUS_VISITORS['PRECISION'])
+        sketch.add(visitor_id)
+        return self.merge(course_id, day or timezone.localdate(), sketch)
+
+    def merge(self, course_id, day, sketch):
+        """
+        Fold ``sketch`` into the stored sketch of ``course_id`` and ``day``.
+        Repeat visitors usually leave the stored registers unchanged, so the
+        row is only locked and rewritten when the merge changes it. Returns
+        True if it did.
+        """
+        stored = self.filter(course_id=course_id, day=day).values_list('sketch', flat=True).first()
+        if stored is not None and not HyperLogLog.from_bytes(stored).merge(sketch):
+            return False
+
+        with transaction.atomic():
+            row, _ = self.select_for_update().get_or_create(
+                course_id=course_id, day=day, defaults={'sketch': sketch.to_bytes()}
+            )
+            current = HyperLogLog.from_bytes(row.sketch)
+            if current.merge(sketch):
+                row.sketch = current.to_bytes()
+                row.save(update_fields=['sketch'])
+        return True
+
+    def estimate(self, course_id, since=None):
+        """Sketch of the anonymous visitors of ``course_id`` since ``since``, all days merged."""
+        total = HyperLogLog(settings.ANONYMOUS_VISITORS['PRECISION'])
+        sketches = self.filter(course_id=course_id)
+        if since is not None:
+            sketches = sketches.filter(day__gte=since)
+        for sketch in sketches.values_list('sketch', flat=True).iterator():
+            total.merge(HyperLogLog.from_bytes(sketch))
+        return total
+
+
+class AnonymousCourseVisitors(models.Model):
+    """HyperLogLog sketch of the anonymous visitors of a course on one day."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='anonymous_visitors')
+    day = models.DateField()
+    sketch = models.BinaryField()
+
+    objects = AnonymousCourseVisitorsManager()
+
+    class Meta:
+        unique_together = ('course', 'day')
+
+    def __str__(self):
+        return f"{self.course_id} anonymous visitors on {self.day}"
@@ -0,0 +1,47 @@
+import datetime
+import time
+
+from django.db.models import Min
+from django.utils import timezone
+
+from .export import COLUMNS, render_ndjson
+from .models import CourseView, Watermark
+from .rollups import rollup_course_views, rollups_kept
+
+
+def archive_course_views(days, batch_size=5000, dump=None, pause=0):
+    """
+    Delete the CourseView events older than ``days`` days. Their counts
+    live on in CourseViewDaily, which is brought up to date first, and
+    only events every incremental stats job has processed (those at or
+    below the lowest Watermark) are removed, so no reported count changes.
+
+    Events go in batches of ``batch_size`` ids, each its own short
+    transaction, optionally ``pause`` seconds apart. With ``dump``, a text
+    stream, the deleted rows are written to it as NDJSON first. Returns
+    the number of deleted events.
+    """
+    rollup_course_views()
+    safe_id = Watermark.objects.aggregate(last_id=Min('last_id'))['last_id'] or 0
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+
+    deleted = 0
+    after = 0
+    while True:
+        ids = list(
+            CourseView.objects.filter(id__gt=after, id__lte=safe_id, viewed_at__lt=cutoff)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+
+        batch = CourseView.objects.filter(id__in=ids)
+        if dump is not None:
+            for line in render_ndjson(COLUMNS, batch.order_by('id').values_list(*COLUMNS).iterator()):
+                dump.write(line)
+        # archived events must stay counted in the rollups
+        with rollups_kept():
+            deleted += batch.delete()[0]
+        after = ids[-1]
+        if pause:
+            time.sleep(pause)
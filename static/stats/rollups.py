@@ -0,0 +1,179 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from courses.models import Course
+from .models import CourseView, CourseViewDaily, Watermark, settled_views
+
+WATERMARK = 'course_view_daily'
+
+
+def get_watermark():
+    return Watermark.objects.filter(name=WATERMARK).values_list('last_id', flat=True).first() or 0
+
+
+def rollup_course_views(batch_size=50000):
+    """
+    Add the CourseView events newer than the watermark to CourseViewDaily,
+    ``batch_size`` ids at a time. Each batch is aggregated by the database
+    and committed together with the watermark, so an interrupted run resumes
+    where it stopped. Returns the number of events rolled up.
+    Views still within the commit lag wait for a later run, see
+    settled_views.
+    """
+    processed = 0
+    now = timezone.now()
+    while True:
+        with transaction.atomic():
+            watermark, _ = Watermark.objects.select_for_update().get_or_create(name=WATERMARK)
+            events = settled_views(CourseView.objects.filter(id__gt=watermark.last_id), now)
+            last_id = events.order_by('id').values_list('id', flat=True)[batch_size - 1:batch_size].first()
+            if last_id is None:
+                last_id = events.order_by('-id').values_list('id', flat=True).first()
+                if last_id is None:
+                    return processed
+
+            batch = (
+                events.filter(id__lte=last_id)
+                .annotate(day=TruncDate('viewed_at'))
+                .values('course_id', 'day')
+                .annotate(views=Count('id'), unique_users=Count('user', distinct=True))
+                .order_by()
+            )
+            # a user views a course once, so unique users of separate batches add up
+            rows = {(row['course_id'], row['day']): row for row in batch}
+            processed += sum(row['views'] for row in rows.values())
+            existing = CourseViewDaily.objects.filter(
+                course_id__in={course_id for course_id, _ in rows},
+                day__in={day for _, day in rows},
+            )
+            updated = []
+            for daily in existing:
+                row = rows.pop((daily.course_id, daily.day), None)
+                if row is not None:
+                    daily.views += row['views']
+                    daily.unique_users += row['unique_users']
+                    updated.append(daily)
+            CourseViewDaily.objects.bulk_update(updated, ['views', 'unique_users'], batch_size=1000)
+            CourseViewDaily.objects.bulk_create(
+                (
+                    CourseViewDaily(course_id=course_id, day=day, views=row['views'], unique_users=row['unique_users'])
+                    for (course_id, day), row in rows.items()
+                ),
+                batch_size=1000,
+            )
+
+            watermark.last_id = last_id
+            watermark.processed_at = timezone.now()
+            watermark.save()
+
+
+def course_view_counts(course_ids):
+    """
+    Views of each of ``course_ids`` in a single query: the rolled up daily
+    rows plus the events newer than the watermark. Unknown ids count 0.
+    """
+    last_id = Coalesce(Subquery(Watermark.objects.filter(name=WATERMARK).values('last_id')[:1]), 0)
+    rolled_up = (
+        CourseViewDaily.objects.filter(course=OuterRef('pk'))
+        .values('course').annotate(views=Sum('views')).values('views')
+    )
+    tail = (
+        CourseView.objects.filter(course=OuterRef('pk'), id__gt=last_id)
+        .values('course').annotate(views=Count('id')).values('views')
+    )
+    rows = Course.objects.filter(pk__in=course_ids).annotate(
+        rolled_up=Coalesce(Subquery(rolled_up, output_field=IntegerField()), 0),
+        tail=Coalesce(Subquery(tail, output_field=IntegerField()), 0),
+    ).values_list('pk', 'rolled_up', 'tail')
+    counts = {pk: rolled + tail for pk, rolled, tail in rows}
+    return {course_id: counts.get(course_id, 0) for course_id in course_ids}
+
+
+# ids of the users and courses being deleted, their views are handled in bulk
+_deleting = threading.local()
+
+
+class _Deletion:
+    """Alive while the transaction deleting an id may still commit."""
+
+
+def deleting(kind):
+    if not hasattr(_deleting, kind):
+        setattr(_deleting, kind, {})
+    return getattr(_deleting, kind)
+
+
+def mark_deleting(kind, pk):
+    # a rolled back delete never reaches post_delete, but rolling back drops
+    # the on_commit callback and with it the only reference to the marker
+    marker = _Deletion()
+    deleting(kind)[pk] = weakref.ref(marker)
+    transaction.on_commit(lambda: deleted(kind, pk, marker))
+
+
+def is_deleting(kind, pk):
+    marker = deleting(kind).get(pk)
+    if marker is None:
+        return False
+    if marker() is None:
+        del deleting(kind)[pk]
+        return False
+    return True
+
+
+def forget_user_views(user_id):
+    """
+    Take the rolled up views of a user about to be deleted out of the daily
+    rows in one UPDATE, the per view post_delete then has nothing to do.
+    Each user views a course once, so views and unique users drop alike.
+    """
+    mark_deleting('users', user_id)
+    rolled_up = CourseView.objects.filter(
+        user_id=user_id, id__lte=Coalesce(Subquery(Watermark.objects.filter(name=WATERMARK).values('last_id')[:1]), 0)
+    )
+    removed = Coalesce(Subquery(
+        rolled_up.filter(course=OuterRef('course'), viewed_at__date=OuterRef('day'))
+        .values('course').annotate(views=Count('id')).values('views'),
+        output_field=IntegerField(),
+    ), 0)
+    CourseViewDaily.objects.filter(course__in=rolled_up.values('course')).update(
+        views=F('views') - removed, unique_users=F('unique_users') - removed
+    )
+
+
+def forget_course_views(course_id):
+    """The daily rows of a course about to be deleted go with it, its views need no update."""
+    mark_deleting('courses', course_id)
+
+
+def deleted(kind, pk, marker=None):
+    current = deleting(kind).get(pk)
+    if current is not None and (marker is None or current() is marker):
+        del deleting(kind)[pk]
+
+
+@contextmanager
+def rollups_kept():
+    """CourseView deletes inside the block leave the daily rows as they are."""
+    _deleting.keep = getattr(_deleting, 'keep', 0) + 1
+    try:
+        yield
+    finally:
+        _deleting.keep -= 1
+
+
+def forget_view(view):
+    """Take a deleted, already rolled up CourseView out of its daily row."""
+    if getattr(_deleting, 'keep', 0) or is_deleting('users', view.user_id) or is_deleting('courses', view.course_id):
+        return
+    if view.pk > get_watermark():
+        return
+    CourseViewDaily.objects.filter(course_id=view.course_id, day=timezone.localtime(view.viewed_at).date()).update(
+        views=F('views') - 1, unique_users=F('unique_users') - 1
+    )
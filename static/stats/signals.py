@@ -0,0 +1,68 @@
+from collections import Counter
+
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import CustomUser
+from accounts.signals import users_bulk_created
+from courses.models import Course
+from .models import CourseView
+from .rollups import deleted, forget_course_views, forget_user_views, forget_view
+from .counters import adjust_user_count
+
+
+@receiver(post_delete, sender=CourseView)
+def unroll_course_view(sender, instance, **kwargs):
+    forget_view(instance)
+
+
+# a deleted user or course cascades to its views, unroll them in bulk
+@receiver(pre_delete, sender=CustomUser)
+def unroll_user_views(sender, instance, **kwargs):
+    forget_user_views(instance.pk)
+
+
+@receiver(pre_delete, sender=Course)
+def unroll_course_views(sender, instance, **kwargs):
+    forget_course_views(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_views_unrolled(sender, instance, **kwargs):
+    deleted('users', instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def course_views_unrolled(sender, instance, **kwargs):
+    deleted('courses', instance.pk)
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_user_type(sender, instance, update_fields=None, **kwargs):
+    # login only saves last_login, skip the lookup when user_type cannot change
+    instance._counted_user_type = None
+    if instance._state.adding or (update_fields is not None and 'user_type' not in update_fields):
+        return
+    instance._counted_user_type = (
+        CustomUser.objects.filter(pk=instance.pk).values_list('user_type', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def count_user(sender, instance, created, **kwargs):
+    if created:
+        adjust_user_count(instance.user_type, 1)
+    elif instance._counted_user_type and instance._counted_user_type != instance.user_type:
+        adjust_user_count(instance._counted_user_type, -1)
+        adjust_user_count(instance.user_type, 1)
+
+
+@receiver(post_delete, sender=CustomUser)
+def uncount_user(sender, instance, **kwargs):
+    adjust_user_count(instance.user_type, -1)
+
+
+@receiver(users_bulk_created)
+def count_imported_users(sender, users, **kwargs):
+    for user_type, count in Counter(user.user_type for user in users).items():
+        adjust_user_count(user_type, count)
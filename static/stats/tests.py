@@ -1,3 +1,837 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import os
+import tempfile
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from accounts.choices import UserTypeChoices
+from courses.models import Course
+from .models import (
+    AnonymousCourseVisitors, CourseView, CourseTrendingScore, CourseViewDaily, UserTypeCount, Watermark
+)
+from .hyperloglog import HyperLogLog
+from .buffer import CourseViewBuffer
+from .trending import decay, update_trending_scores
+from .rollups import rollup_course_views
+from .counters import reconcile_user_counts, user_count
+
+
+def create_course(owner, **kwargs):
+    data = {
+        'owner': owner,
+        'title': 'Test Course',
+        'description': 'Test course description',
+        'duration_weeks': 8,
+        'price': Decimal('199.99'),
+        'country': 'United States',
+        'category': 'language',
+        'start_date': datetime.date.today() + datetime.timedelta(days=30),
+        'image': 'test_image.jpg',
+    }
+    data.update(kwargs)
+    return Course.objects.create(**data)
+
+
+class CourseViewRecordTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.student = CustomUser.objects.create_user(
+            email='student@example.com',
+            password='password123',
+            full_name='Student User',
+            user_type=UserTypeChoices.STUDENT
+        )
+        self.course = create_course(self.admin)
+
+    def test_record_first_view(self):
+        """Test the first view creates a CourseView and bumps the counter"""
+        self.assertTrue(CourseView.objects.record(self.student, self.course))
+        self.assertEqual(self.course.requests, 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.requests, 1)
+        self.assertEqual(CourseView.objects.filter(course=self.course).count(), 1)
+
+    def test_record_repeated_view(self):
+        """Test a repeated view by the same user is not counted twice"""
+        CourseView.objects.record(self.student, self.course)
+        self.assertFalse(CourseView.objects.record(self.student, self.course))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.requests, 1)
+        self.assertEqual(CourseView.objects.filter(course=self.course).count(), 1)
+
+    def test_retrieve_returns_updated_counter(self):
+        """Test retrieve reports the incremented counter without refetching the course"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('course-detail', kwargs={'pk': self.course.id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['requests'], 1)
+
+    def test_retrieve_anonymous_not_recorded(self):
+        """Test anonymous retrieve works and does not create a CourseView"""
+        url = reverse('course-detail', kwargs={'pk': self.course.id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(CourseView.objects.exists())
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class CourseViewConcurrencyTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.course = create_course(self.admin)
+        self.url = reverse('course-detail', kwargs={'pk': self.course.id})
+
+    def run_parallel(self, users):
+        barrier = threading.Barrier(len(users))
+        responses = []
+
+        def view(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                barrier.wait()
+                responses.append(client.get(self.url).status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=view, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return responses
+
+    def test_parallel_views_by_different_users(self):
+        """Test concurrent views by distinct users do not lose increments"""
+        users = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(self.threads)
+        ]
+        responses = self.run_parallel(users)
+
+        self.assertEqual(responses, [status.HTTP_200_OK] * self.threads)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.requests, self.threads)
+        self.assertEqual(CourseView.objects.filter(course=self.course).count(), self.threads)
+
+    def test_parallel_views_by_same_user(self):
+        """Test concurrent views by one user are counted once without errors"""
+        student = CustomUser.objects.create_user(
+            email='student@example.com',
+            password='password123',
+            user_type=UserTypeChoices.STUDENT
+        )
+        responses = self.run_parallel([student] * self.threads)
+
+        self.assertEqual(responses, [status.HTTP_200_OK] * self.threads)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.requests, 1)
+        self.assertEqual(CourseView.objects.filter(course=self.course).count(), 1)
+
+
+class CourseViewBufferTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(3)
+        ]
+        self.course = create_course(self.admin)
+        self.other_course = create_course(self.admin, title='Other Course')
+        self.buffer = CourseViewBuffer(enabled=True, max_size=10, flush_interval=None)
+
+    def test_flush_writes_new_views_and_counters(self):
+        """Test a flush bulk-inserts the queued views and bumps each course once per new view"""
+        for student in self.students:
+            self.buffer.add(student.id, self.course.id)
+        self.buffer.add(self.students[0].id, self.other_course.id)
+
+        self.assertEqual(self.buffer.metrics()['queue_depth'], 4)
+        self.assertEqual(self.buffer.flush(), 4)
+        self.assertEqual(self.buffer.metrics()['queue_depth'], 0)
+
+        self.course.refresh_from_db()
+        self.other_course.refresh_from_db()
+        self.assertEqual(self.course.requests, 3)
+        self.assertEqual(self.other_course.requests, 1)
+        self.assertEqual(CourseView.objects.count(), 4)
+
+    def test_flush_skips_duplicates(self):
+        """Test repeated and already recorded views are not counted again"""
+        CourseView.objects.record(self.students[0], self.course)
+        self.buffer.add(self.students[0].id, self.course.id)
+        self.buffer.add(self.students[1].id, self.course.id)
+        self.buffer.add(self.students[1].id, self.course.id)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.requests, 2)
+        self.assertEqual(CourseView.objects.filter(course=self.course).count(), 2)
+
+    def test_insert_counts_only_inserted_rows(self):
+        """Test a pair inserted by someone else after the existence check is not counted"""
+        CourseView.objects.record(self.students[0], self.course)
+        pairs = [(self.students[0].id, self.course.id), (self.students[1].id, self.course.id)]
+        for returning in (True, False):
+            with self.subTest(returning=returning), \
+                    mock.patch('stats.buffer.supports_insert_returning', return_value=returning):
+                CourseView.objects.filter(user=self.students[1]).delete()
+                self.assertEqual(self.buffer._insert(pairs), [self.course.id])
+
+    def test_full_buffer_drops_events(self):
+        """Test events beyond the queue size are dropped and counted"""
+        buffer = CourseViewBuffer(enabled=True, max_size=2, flush_interval=None)
+        results = [buffer.add(student.id, self.course.id) for student in self.students]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(buffer.metrics()['dropped'], 1)
+        self.assertEqual(buffer.flush(), 2)
+
+    def test_buffer_metrics_admin_only(self):
+        """Test the buffer metrics endpoint is restricted to admins"""
+        client = APIClient()
+        url = reverse('course-view-buffer')
+
+        client.force_authenticate(user=self.students[0])
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        client.force_authenticate(user=self.admin)
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('queue_depth', response.data)
+        self.assertIn('dropped', response.data)
+
+
+@override_settings(
+    TRENDING={'HALF_LIFE_HOURS': 24, 'MIN_SCORE': 0.01, 'DEFAULT_LIMIT': 6, 'MAX_LIMIT': 50},
+    COURSE_VIEW_WATERMARK={'LAG_SECONDS': 0},
+)
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(4)
+        ]
+        self.old = create_course(self.admin, title='Old favourite')
+        self.new = create_course(self.admin, title='New hit')
+        self.now = timezone.now()
+
+    def view(self, user, course, hours_ago):
+        view = CourseView.objects.create(user=user, course=course)
+        CourseView.objects.filter(pk=view.pk).update(viewed_at=self.now - datetime.timedelta(hours=hours_ago))
+
+    def test_recent_views_outrank_old_ones(self):
+        """Test three day old views count less than fresh ones"""
+        for student in self.students:
+            self.view(student, self.old, hours_ago=72)
+        for student in self.students[:2]:
+            self.view(student, self.new, hours_ago=0)
+
+        self.assertEqual(update_trending_scores(now=self.now), 6)
+        self.assertAlmostEqual(CourseTrendingScore.objects.get(course=self.old).score, 4 * 0.125)
+        self.assertAlmostEqual(CourseTrendingScore.objects.get(course=self.new).score, 2.0)
+
+    def test_update_is_incremental(self):
+        """Test a later run decays stored scores and only reads new views"""
+        self.view(self.students[0], self.new, hours_ago=0)
+        update_trending_scores(now=self.now)
+        self.view(self.students[1], self.new, hours_ago=0)
+
+        later = self.now + datetime.timedelta(hours=24)
+        self.assertEqual(update_trending_scores(now=later), 1)
+        # the old view halved, the new one was recorded a day before ``later``
+        self.assertAlmostEqual(CourseTrendingScore.objects.get(course=self.new).score, 0.5 + 0.5)
+        self.assertEqual(Watermark.objects.get(name='trending').last_id, CourseView.objects.latest('id').id)
+        self.assertEqual(update_trending_scores(now=later), 0)
+
+    def test_late_commit_is_scored(self):
+        """Test a view committed after one with a higher id is still scored"""
+        # the id of a view whose transaction is still open
+        pending = CourseView.objects.create(user=self.students[0], course=self.new)
+        pending.delete()
+        self.view(self.students[1], self.new, hours_ago=0)
+        with override_settings(COURSE_VIEW_WATERMARK={'LAG_SECONDS': 300}):
+            self.assertEqual(update_trending_scores(now=self.now), 0)
+            self.assertEqual(Watermark.objects.get(name='trending').last_id, 0)
+
+            # it commits, then both are older than the lag
+            CourseView.objects.create(id=pending.id, user=self.students[0], course=self.new)
+            CourseView.objects.filter(pk=pending.id).update(viewed_at=self.now)
+            later = self.now + datetime.timedelta(minutes=10)
+            self.assertEqual(update_trending_scores(now=later), 2)
+        self.assertAlmostEqual(CourseTrendingScore.objects.get(course=self.new).score, 2 * decay(600))
+
+    def test_forgotten_courses_are_pruned(self):
+        """Test scores that decayed below the minimum are removed"""
+        self.view(self.students[0], self.old, hours_ago=0)
+        update_trending_scores(now=self.now)
+        update_trending_scores(now=self.now + datetime.timedelta(days=30))
+        self.assertFalse(CourseTrendingScore.objects.exists())
+
+    def test_trending_endpoint(self):
+        """Test the trending list is ordered by score with a fixed number of queries"""
+        self.view(self.students[0], self.old, hours_ago=48)
+        for student in self.students:
+            self.view(student, self.new, hours_ago=1)
+        update_trending_scores(now=self.now)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('course-trending'), {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], [self.new.id])
+
+        response = self.client.get(reverse('course-trending'), {'fields': 'id'})
+        self.assertEqual([item['id'] for item in response.data], [self.new.id, self.old.id])
+        self.assertGreater(response.data[0]['trending_score'], response.data[1]['trending_score'])
+
+
+@override_settings(COURSE_VIEW_WATERMARK={'LAG_SECONDS': 0})
+class CourseViewRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(5)
+        ]
+        self.course = create_course(self.admin)
+        self.client.force_authenticate(user=self.admin)
+
+    def view(self, user, days_ago=0):
+        view = CourseView.objects.create(user=user, course=self.course)
+        viewed_at = timezone.now() - datetime.timedelta(days=days_ago)
+        CourseView.objects.filter(pk=view.pk).update(viewed_at=viewed_at)
+        return view
+
+    def test_rollup_in_batches(self):
+        """Test views are rolled up per day across batches and runs"""
+        for student in self.students[:3]:
+            self.view(student, days_ago=1)
+        self.view(self.students[3])
+
+        self.assertEqual(rollup_course_views(batch_size=2), 4)
+        self.assertEqual(rollup_course_views(), 0)
+        self.view(self.students[4])
+        self.assertEqual(rollup_course_views(), 1)
+
+        daily = CourseViewDaily.objects.filter(course=self.course).order_by('day')
+        self.assertEqual([(row.views, row.unique_users) for row in daily], [(3, 3), (2, 2)])
+
+    def test_count_reads_rollups_and_tail(self):
+        """Test the course view count adds the un-rolled tail to the rollups"""
+        for student in self.students[:3]:
+            self.view(student, days_ago=2)
+        rollup_course_views()
+        self.view(self.students[3])
+
+        url = reverse('courseview-detail', args=[self.course.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {'course_views_count': 4})
+
+    def test_deleted_view_leaves_rollup(self):
+        """Test deleting a rolled up view takes it out of the daily counts"""
+        view = self.view(self.students[0])
+        self.view(self.students[1])
+        rollup_course_views()
+        view.delete()
+
+        daily = CourseViewDaily.objects.get(course=self.course)
+        self.assertEqual((daily.views, daily.unique_users), (1, 1))
+        response = self.client.get(reverse('courseview-detail', args=[self.course.id]))
+        self.assertEqual(response.json(), {'course_views_count': 1})
+
+    def test_rollup_leaves_recent_views(self):
+        """Test the watermark stops before views younger than the lag, even with older ones after them"""
+        self.view(self.students[0], days_ago=1)
+        recent = self.view(self.students[1])
+        self.view(self.students[2], days_ago=1)
+        with override_settings(COURSE_VIEW_WATERMARK={'LAG_SECONDS': 300}):
+            self.assertEqual(rollup_course_views(), 1)
+        self.assertEqual(Watermark.objects.get(name='course_view_daily').last_id, recent.id - 1)
+        self.assertEqual(rollup_course_views(), 2)
+
+    def test_deleted_user_leaves_rollup(self):
+        """Test deleting a user unrolls their views in bulk instead of per view"""
+        other = create_course(self.admin, title='Other Course')
+        for student in self.students[:2]:
+            self.view(student, days_ago=1)
+        CourseView.objects.create(user=self.students[0], course=other)
+        rollup_course_views()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.students[0].delete()
+        self.assertEqual(len([query for query in queries if 'UPDATE "stats_courseviewdaily"' in query['sql']]), 1)
+        views = CourseViewDaily.objects.filter(course__in=[self.course, other]).values_list('course', 'views', 'unique_users')
+        self.assertEqual(sorted(views), sorted([(self.course.id, 1, 1), (other.id, 0, 0)]))
+
+        other.delete()
+        self.assertEqual(CourseViewDaily.objects.filter(course=self.course).get().views, 1)
+
+    def test_failed_user_delete_keeps_unrolling(self):
+        """Test views of a user whose delete rolled back are unrolled one by one again"""
+        view = self.view(self.students[0], days_ago=1)
+        self.view(self.students[1], days_ago=1)
+        rollup_course_views()
+
+        with mock.patch('django.db.models.sql.DeleteQuery.delete_batch', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    self.students[0].delete()
+        self.assertEqual(CourseViewDaily.objects.get(course=self.course).views, 2)
+
+        CourseView.objects.get(pk=view.pk).delete()
+        self.assertEqual(CourseViewDaily.objects.get(course=self.course).views, 1)
+
+
+class UserTypeCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(3)
+        ]
+
+    def test_counts_follow_saves_and_deletes(self):
+        """Test creating, retyping and deleting users keeps the counters right"""
+        self.assertEqual(user_count(UserTypeChoices.STUDENT), 3)
+
+        student = self.students[0]
+        student.user_type = UserTypeChoices.PARTNER
+        student.save()
+        student.save()
+        self.assertEqual(user_count(UserTypeChoices.STUDENT), 2)
+        self.assertEqual(user_count(UserTypeChoices.PARTNER), 1)
+
+        self.students[1].delete()
+        self.assertEqual(user_count(UserTypeChoices.STUDENT), 1)
+
+    def test_reconcile_corrects_drift(self):
+        """Test reconcile fixes counters after changes that bypass signals"""
+        CustomUser.objects.filter(pk=self.students[0].pk).update(user_type=UserTypeChoices.ADMIN)
+
+        drift = reconcile_user_counts()
+        self.assertEqual(drift, {UserTypeChoices.STUDENT: (3, 2), UserTypeChoices.ADMIN: (0, 1)})
+        self.assertEqual(user_count(UserTypeChoices.ADMIN), 1)
+        self.assertEqual(reconcile_user_counts(), {})
+
+    def test_student_count_view(self):
+        """Test the student count is read from the counter and may be cached"""
+        UserTypeCount.objects.filter(user_type=UserTypeChoices.STUDENT).update(count=42)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student-count'))
+        self.assertEqual(response.json(), {'student_count': 42})
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+
+class CourseViewCountsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(3)
+        ]
+        self.courses = [create_course(self.admin, title=f'Course {i}') for i in range(3)]
+        for course, viewers in zip(self.courses, (self.students, self.students[:1], [])):
+            for student in viewers:
+                CourseView.objects.create(user=student, course=course)
+        rollup_course_views()
+        CourseView.objects.create(user=self.students[1], course=self.courses[1])
+        self.client.force_authenticate(user=self.admin)
+
+    def test_batch_counts(self):
+        """Test ?ids= returns every count from a single query"""
+        ids = ','.join(str(course.id) for course in self.courses) + ',999999'
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('courseview-list'), {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['course_views_counts'], {
+            str(self.courses[0].id): 3,
+            str(self.courses[1].id): 2,
+            str(self.courses[2].id): 0,
+            '999999': 0,
+        })
+
+    def test_batch_counts_bounded(self):
+        """Test ?ids= rejects junk and too many ids"""
+        response = self.client.get(reverse('courseview-list'), {'ids': '1,x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('courseview-list'), {'ids': ','.join(map(str, range(1, 102)))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_course_list_expand_view_count(self):
+        """Test ?expand=view_count adds the counts to a course page with one extra query"""
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('course-list'), {'expand': 'view_count', 'fields': 'id,view_count'})
+        counts = {item['id']: item['view_count'] for item in response.data['results']}
+        self.assertEqual(counts, {self.courses[0].id: 3, self.courses[1].id: 2, self.courses[2].id: 0})
+
+        response = self.client.get(reverse('course-list'), {'fields': 'id'})
+        self.assertNotIn('view_count', response.data['results'][0])
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_within_error(self):
+        """Test the estimate of 20000 distinct values is within three standard errors"""
+        sketch = HyperLogLog()
+        for i in range(20000):
+            sketch.add(f'visitor-{i}')
+        self.assertLess(abs(sketch.count() - 20000) / 20000, 3 * sketch.error)
+        self.assertEqual(len(sketch.to_bytes()), 4096)
+
+    def test_small_counts_and_repeats(self):
+        """Test small counts are near exact and repeats do not change the sketch"""
+        sketch = HyperLogLog()
+        self.assertEqual(sketch.count(), 0)
+        for i in range(10):
+            sketch.add(f'visitor-{i}')
+        self.assertFalse(sketch.add('visitor-3'))
+        self.assertEqual(sketch.count(), 10)
+
+    def test_merge_is_union(self):
+        """Test merging two sketches gives the sketch of the union"""
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            (first if i % 2 else second).add(str(i))
+            union.add(str(i))
+        first.merge(HyperLogLog.from_bytes(second.to_bytes()))
+        self.assertEqual(first.registers, union.registers)
+        with self.assertRaises(ValueError):
+            first.merge(HyperLogLog(precision=10))
+
+
+class AnonymousCourseVisitorsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.course = create_course(self.admin)
+        self.url = reverse('course-detail', kwargs={'pk': self.course.id})
+
+    def visitors(self, **params):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('courseview-anonymous-visitors', args=[self.course.id]), params)
+        self.client.force_authenticate(user=None)
+        return response
+
+    def test_anonymous_views_counted_once_per_visitor(self):
+        """Test anonymous visitors get a cookie and repeat visits are not counted again"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('visitor_id', response.cookies)
+        self.client.get(self.url)
+
+        APIClient().get(self.url)
+        self.assertEqual(self.visitors().data['anonymous_unique_visitors'], 2)
+        self.assertEqual(AnonymousCourseVisitors.objects.count(), 1)
+        self.assertFalse(CourseView.objects.exists())
+
+    def test_days_merge(self):
+        """Test sketches of several days merge and old days fall out of the window"""
+        today = timezone.localdate()
+        for days_ago, visitors in ((0, range(0, 50)), (1, range(25, 75)), (10, range(100, 200))):
+            for visitor in visitors:
+                AnonymousCourseVisitors.objects.record(self.course.id, str(visitor), today - datetime.timedelta(days=days_ago))
+
+        response = self.visitors(days=7)
+        self.assertEqual(response.data['days'], 7)
+        self.assertAlmostEqual(response.data['anonymous_unique_visitors'], 75, delta=3)
+        self.assertAlmostEqual(self.visitors().data['anonymous_unique_visitors'], 175, delta=9)
+        self.assertEqual(self.visitors(days=0).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_buffered_anonymous_views(self):
+        """Test the buffer keeps one sketch per course and day and merges it on flush"""
+        buffer = CourseViewBuffer(enabled=True, flush_interval=None)
+        AnonymousCourseVisitors.objects.record(self.course.id, 'visitor-0')
+        for i in range(40):
+            buffer.add_anonymous(f'visitor-{i % 20}', self.course.id)
+        self.assertEqual(buffer.metrics()['pending_sketches'], 1)
+
+        buffer.flush()
+        self.assertEqual(buffer.metrics()['pending_sketches'], 0)
+        self.assertEqual(self.visitors().data['anonymous_unique_visitors'], 20)
+
+
+class CourseViewExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(3)
+        ]
+        self.course = create_course(self.admin, title='Korean, "Intensive"')
+        self.today = timezone.localdate()
+        for days_ago, student in zip((0, 1, 5), self.students):
+            view = CourseView.objects.create(user=student, course=self.course)
+            viewed_at = timezone.now() - datetime.timedelta(days=days_ago)
+            CourseView.objects.filter(pk=view.pk).update(viewed_at=viewed_at)
+        self.url = reverse('courseview-export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_admin_only(self):
+        """Test only admins can export course views"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_ndjson(self):
+        """Test the default export streams one JSON object per view"""
+        self.client.force_authenticate(user=self.admin)
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([row['user_id'] for row in rows], [student.id for student in self.students])
+        self.assertEqual(set(rows[0]), {'id', 'user_id', 'course_id', 'viewed_at'})
+
+    def test_export_csv_joined_and_filtered(self):
+        """Test the CSV export with joined columns and an inclusive day range"""
+        self.client.force_authenticate(user=self.admin)
+        start = self.today - datetime.timedelta(days=1)
+        rows = list(csv.DictReader(io.StringIO(self.export(output='csv', join='1', start=start, end=self.today))))
+        self.assertEqual([row['user_email'] for row in rows], ['student0@example.com', 'student1@example.com'])
+        self.assertEqual(rows[0]['course_title'], 'Korean, "Intensive"')
+
+        response = self.client.get(self.url, {'start': '2024-02-30'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        """Test the export command writes the same stream to stdout"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('export_course_views', '--output', 'csv', stdout=stdout, stderr=stderr)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 4)
+        self.assertIn('3 course views exported', stderr.getvalue())
+
+
+class CourseViewTimeseriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(6)
+        ]
+        self.course = create_course(self.admin)
+        self.other_course = create_course(self.admin, title='Other Course')
+        self.today = timezone.localdate()
+        self.url = reverse('courseview-timeseries')
+
+    def view(self, user, course, days_ago):
+        view = CourseView.objects.create(user=user, course=course)
+        viewed_at = timezone.now() - datetime.timedelta(days=days_ago)
+        CourseView.objects.filter(pk=view.pk).update(viewed_at=viewed_at)
+        return view
+
+    def series(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['start'], item['views']) for item in response.data['results']]
+
+    def test_daily_buckets_zero_filled(self):
+        """Test daily counts combine rollups and the tail and fill empty days"""
+        for student in self.students[:2]:
+            self.view(student, self.course, days_ago=2)
+        rollup_course_views()
+        self.view(self.students[2], self.course, days_ago=0)
+        self.view(self.students[3], self.other_course, days_ago=0)
+
+        start = self.today - datetime.timedelta(days=3)
+        series = self.series(course=self.course.id, **{'from': start, 'to': self.today})
+        self.assertEqual([views for _, views in series], [0, 2, 0, 1])
+        self.assertEqual(series[0][0], start)
+        self.assertEqual([views for _, views in self.series(**{'from': self.today})], [2])
+
+    def test_week_and_month_buckets(self):
+        """Test week and month buckets start on Monday and the first of the month"""
+        for days_ago, student in zip((0, 7, 8, 40), self.students):
+            self.view(student, self.course, days_ago=days_ago)
+        rollup_course_views()
+
+        start = self.today - datetime.timedelta(days=8)
+        weeks = self.series(bucket='week', **{'from': start})
+        self.assertTrue(all(day.weekday() == 0 for day, _ in weeks))
+        self.assertEqual(sum(views for _, views in weeks), 3)
+
+        months = self.series(bucket='month', **{'from': self.today - datetime.timedelta(days=40)})
+        self.assertTrue(all(day.day == 1 for day, _ in months))
+        self.assertEqual(sum(views for _, views in months), 4)
+
+    def test_closed_buckets_cached(self):
+        """Test past buckets are served from the cache and only today is recounted"""
+        old = self.view(self.students[0], self.course, days_ago=1)
+        params = {'course': self.course.id, 'from': self.today - datetime.timedelta(days=1)}
+        self.assertEqual([views for _, views in self.series(**params)], [1, 0])
+
+        # changes to a closed day are not seen, today is always counted
+        old.delete()
+        self.view(self.students[1], self.course, days_ago=0)
+        self.assertEqual([views for _, views in self.series(**params)], [1, 1])
+
+    def test_invalid_parameters(self):
+        """Test bad buckets, dates and ranges are rejected"""
+        for params in ({'bucket': 'year'}, {'from': 'yesterday'}, {'from': '2020-01-01', 'to': '2019-01-01'},
+                       {'from': '2000-01-01'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CourseViewRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com',
+            password='password123',
+            full_name='Admin User',
+            user_type=UserTypeChoices.ADMIN
+        )
+        self.students = [
+            CustomUser.objects.create_user(
+                email=f'student{i}@example.com',
+                password='password123',
+                full_name=f'Student {i}',
+                user_type=UserTypeChoices.STUDENT
+            )
+            for i in range(5)
+        ]
+        self.course = create_course(self.admin)
+        for days_ago, student in zip((400, 400, 380, 10, 0), self.students):
+            view = CourseView.objects.create(user=student, course=self.course)
+            viewed_at = timezone.now() - datetime.timedelta(days=days_ago)
+            CourseView.objects.filter(pk=view.pk).update(viewed_at=viewed_at)
+
+    def counts(self):
+        count = self.client.get(reverse('courseview-detail', args=[self.course.id])).json()['course_views_count']
+        series = self.client.get(reverse('courseview-timeseries'), {
+            'course': self.course.id, 'bucket': 'month',
+            'from': timezone.localdate() - datetime.timedelta(days=400),
+        }).data['results']
+        return count, [item['views'] for item in series]
+
+    def test_archive_keeps_counts(self):
+        """Test old events are deleted in batches while reported counts stay the same"""
+        before = self.counts()
+        path = os.path.join(tempfile.mkdtemp(), 'views.ndjson.gz')
+        call_command('archive_course_views', '--days', '365', '--batch-size', '2', '--dump', path, stdout=io.StringIO())
+
+        self.assertEqual(CourseView.objects.count(), 2)
+        cache.clear()
+        self.assertEqual(self.counts(), before)
+        with gzip.open(path, 'rt') as dump:
+            rows = [json.loads(line) for line in dump]
+        self.assertEqual([row['user_id'] for row in rows], [student.id for student in self.students[:3]])
+
+    def test_unprocessed_events_kept(self):
+        """Test events a stats job has not processed yet are not archived"""
+        Watermark.objects.create(name='trending', last_id=CourseView.objects.order_by('id')[0].id)
+        call_command('archive_course_views', stdout=io.StringIO())
+        self.assertEqual(CourseView.objects.count(), 4)
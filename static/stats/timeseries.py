@@ -0,0 +1,97 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from .models import CourseView, CourseViewDaily
+from .export import day_start
+from .rollups import get_watermark
+
+BUCKETS = ('day', 'week', 'month')
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    if bucket == 'week':
+        return start + datetime.timedelta(days=7)
+    if bucket == 'month':
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def bucket_starts(start, end, bucket):
+    """Start days of the buckets covering ``start`` to ``end`` inclusive."""
+    current = bucket_start(start, bucket)
+    while current <= end:
+        yield current
+        current = next_bucket(current, bucket)
+
+
+def cache_key(course_id, bucket, start):
+    return f"stats:timeseries:{course_id or 'all'}:{bucket}:{start.isoformat()}"
+
+
+def count_views(course_id, start, end, bucket):
+    """
+    Views per bucket start for the buckets from ``start`` to ``end``: the
+    daily rollups plus the events past the watermark, one grouped query each.
+    """
+    daily = CourseViewDaily.objects.filter(day__gte=start, day__lte=end)
+    events = CourseView.objects.filter(
+        id__gt=get_watermark(),
+        viewed_at__gte=day_start(start),
+        viewed_at__lt=day_start(end + datetime.timedelta(days=1)),
+    ).annotate(day=TruncDate('viewed_at'))
+    if course_id is not None:
+        daily = daily.filter(course_id=course_id)
+        events = events.filter(course_id=course_id)
+
+    counts = {}
+    for rows, total in ((daily, Sum('views')), (events, Count('id'))):
+        grouped = (
+            rows.annotate(bucket=F('day') if bucket == 'day' else Trunc('day', bucket, output_field=DateField()))
+            .values('bucket').annotate(views=total).order_by()
+        )
+        for row in grouped:
+            counts[row['bucket']] = counts.get(row['bucket'], 0) + row['views']
+    return counts
+
+
+def course_view_timeseries(course_id, start, end, bucket='day'):
+    """
+    Zero-filled [(bucket start, views)] from ``start`` to ``end``, widened
+    to whole buckets. Buckets that ended before today never change again,
+    so they are cached and only the missing and current ones are counted.
+    """
+    starts = list(bucket_starts(start, end, bucket))
+    today = timezone.localdate()
+    closed = [day for day in starts if next_bucket(day, bucket) <= today]
+
+    counts = {}
+    cached = cache.get_many([cache_key(course_id, bucket, day) for day in closed])
+    for day in closed:
+        key = cache_key(course_id, bucket, day)
+        if key in cached:
+            counts[day] = cached[key]
+
+    missing = [day for day in starts if day not in counts]
+    if missing:
+        last = next_bucket(missing[-1], bucket) - datetime.timedelta(days=1)
+        fresh = count_views(course_id, missing[0], last, bucket)
+        for day in missing:
+            counts[day] = fresh.get(day, 0)
+        cache.set_many(
+            {cache_key(course_id, bucket, day): counts[day] for day in missing if day in closed},
+            settings.COURSE_VIEW_TIMESERIES['CACHE_TIMEOUT'],
+        )
+    return [(day, counts[day]) for day in starts]
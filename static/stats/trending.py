@@ -0,0 +1,95 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CourseTrendingScore, CourseView, Watermark, settled_views
+
+WATERMARK = 'trending'
+
+
+def half_life_seconds():
+    return timedelta(hours=settings.TRENDING['HALF_LIFE_HOURS']).total_seconds()
+
+
+def decay(seconds):
+    return 0.5 ** (max(seconds, 0) / half_life_seconds())
+
+
+def update_trending_scores(now=None, chunk_size=5000):
+    """
+    Decay every stored score to ``now`` and add the CourseView events that
+    arrived since the last run. Work is proportional to the new events plus
+    the number of scored courses, never to the whole event table. Views
+    still within the commit lag wait for a later run, see settled_views.
+    Returns the number of events processed.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        watermark, _ = Watermark.objects.select_for_update().get_or_create(name=WATERMARK)
+
+        if watermark.processed_at is not None:
+            factor = decay((now - watermark.processed_at).total_seconds())
+            CourseTrendingScore.objects.update(score=F('score') * factor, scored_at=now)
+
+        contributions = defaultdict(float)
+        last_id = watermark.last_id
+        processed = 0
+        events = (
+            settled_views(CourseView.objects.filter(id__gt=watermark.last_id), now)
+            .order_by('id')
+            .values_list('id', 'course_id', 'viewed_at')
+        )
+        for pk, course_id, viewed_at in events.iterator(chunk_size=chunk_size):
+            contributions[course_id] += decay((now - viewed_at).total_seconds())
+            last_id = pk
+            processed += 1
+
+        scores = CourseTrendingScore.objects.in_bulk(list(contributions))
+        for course_id, contribution in contributions.items():
+            if course_id in scores:
+                scores[course_id].score += contribution
+            else:
+                scores[course_id] = CourseTrendingScore(course_id=course_id, score=contribution, scored_at=now)
+        CourseTrendingScore.objects.bulk_update(
+            [score for score in scores.values() if score._state.adding is False],
+            ['score'], batch_size=chunk_size,
+        )
+        CourseTrendingScore.objects.bulk_create(
+            [score for score in scores.values() if score._state.adding], batch_size=chunk_size,
+        )
+
+        # keep the table compact, long forgotten courses drop out
+        CourseTrendingScore.objects.filter(score__lt=settings.TRENDING['MIN_SCORE']).delete()
+
+        watermark.last_id = last_id
+        watermark.processed_at = now
+        watermark.save()
+    return processed
+
+
+def trending_courses(queryset, limit=None):
+    """
+    Top ``limit`` courses of ``queryset`` by trending score, read from the
+    precomputed scores so the cost does not grow with the view history.
+    Each course gets ``current_trending_score`` decayed to now.
+    """
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        limit = settings.TRENDING['DEFAULT_LIMIT']
+    limit = min(max(limit, 1), settings.TRENDING['MAX_LIMIT'])
+
+    courses = list(
+        queryset.filter(trending_score__isnull=False)
+        .select_related('trending_score')
+        .order_by('-trending_score__score', '-id')[:limit]
+    )
+    now = timezone.now()
+    for course in courses:
+        score = course.trending_score
+        course.current_trending_score = score.score * decay((now - score.scored_at).total_seconds())
+    return courses
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import student_count_view, CourseViewViewSet
+from .views import student_count_view, course_view_buffer_view, CourseViewViewSet
 
 router = DefaultRouter()
 router.register(r'course-views', CourseViewViewSet)
 
 urlpatterns = [
     path('student-count/', student_count_view, name='student-count'),
+    path('course-view-buffer/', course_view_buffer_view, name='course-view-buffer'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,24 +1,157 @@
 from django.shortcuts import render
-from accounts.models import CustomUser
 from accounts.choices import UserTypeChoices
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.conf import settings
+from django.utils import timezone
+import datetime
 from rest_framework import viewsets
-from .models import CourseView
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+from .models import AnonymousCourseVisitors, CourseView
+from .buffer import course_view_buffer
+from .rollups import course_view_counts
+from .counters import user_count
+from .export import CONTENT_TYPES, export_rows, parse_day, render
+from .timeseries import BUCKETS, bucket_starts, course_view_timeseries
 from .serializers import CourseViewSerializer
 
 
-# get the number of students    
+# get the number of students, read from the maintained counter
+@cache_control(public=True, max_age=60)
 def student_count_view(request):
-    student_count = CustomUser.objects.filter(user_type=UserTypeChoices.STUDENT).count()
+    student_count = user_count(UserTypeChoices.STUDENT)
     return JsonResponse({'student_count': student_count})
 
 
+# queue depth and dropped events of this worker's course view buffer
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def course_view_buffer_view(request):
+    if request.user.user_type != UserTypeChoices.ADMIN:
+        raise PermissionDenied("Only admins can see the course view buffer metrics!!!")
+    return Response(course_view_buffer.metrics())
+
+
+# upper bound of ?ids= on the course view counts, a catalogue page is far below it
+MAX_COURSE_IDS = 100
+
+
+def parse_course_ids(value):
+    try:
+        ids = list(dict.fromkeys(int(item) for item in value.split(',') if item.strip()))
+    except ValueError:
+        raise ValidationError({'ids': 'Course ids must be integers.'})
+    if not ids or len(ids) > MAX_COURSE_IDS:
+        raise ValidationError({'ids': f'Pass between 1 and {MAX_COURSE_IDS} course ids.'})
+    return ids
+
+
 class CourseViewViewSet(viewsets.ModelViewSet):
     queryset = CourseView.objects.all()
     serializer_class = CourseViewSerializer
-    
+
+    def list(self, request, *args, **kwargs):
+        # ?ids=1,2,3 answers the view counts of a whole catalogue page at once
+        if 'ids' in request.query_params:
+            counts = course_view_counts(parse_course_ids(request.query_params['ids']))
+            return Response({'course_views_counts': {str(pk): count for pk, count in counts.items()}})
+        return super().list(request, *args, **kwargs)
+
     def retrieve(self, request, *args, **kwargs):
-        course_id = kwargs.get('pk')
-        course_views_count = CourseView.objects.filter(course_id=course_id).count()
+        try:
+            course_id = int(kwargs.get('pk'))
+        except ValueError:
+            raise NotFound()
+        course_views_count = course_view_counts([course_id])[course_id]
         return JsonResponse({'course_views_count': course_views_count})
-    
\ No newline at end of file
+
+    @action(detail=True, url_path='anonymous-visitors')
+    def anonymous_visitors(self, request, pk=None):
+        """
+        Estimated distinct anonymous visitors of the course over the last
+        ``?days=`` days. The estimate is within ``relative_error`` of the true
+        count about 68% of the time and within three times that almost always.
+        """
+        config = settings.ANONYMOUS_VISITORS
+        try:
+            course_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        try:
+            days = int(request.query_params.get('days', config['DEFAULT_DAYS']))
+        except ValueError:
+            raise ValidationError({'days': 'Days must be an integer.'})
+        if not 1 <= days <= config['MAX_DAYS']:
+            raise ValidationError({'days': f"Pass between 1 and {config['MAX_DAYS']} days."})
+
+        since = timezone.localdate() - datetime.timedelta(days=days - 1)
+        sketch = AnonymousCourseVisitors.objects.estimate(course_id, since)
+        return Response({
+            'anonymous_unique_visitors': sketch.count(),
+            'days': days,
+            'relative_error': round(sketch.error, 4),
+        })
+    
+    @action(detail=False)
+    def timeseries(self, request):
+        """
+        Views per ``?bucket=day|week|month`` from ``?from=`` to ``?to=``
+        (YYYY-MM-DD, inclusive, widened to whole buckets), zero-filled, for
+        ``?course=`` or every course.
+        """
+        config = settings.COURSE_VIEW_TIMESERIES
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            raise ValidationError({'bucket': f"Choose one of {', '.join(BUCKETS)}."})
+        try:
+            course_id = int(request.query_params['course']) if request.query_params.get('course') else None
+        except ValueError:
+            raise ValidationError({'course': 'Course must be an integer id.'})
+        days = {}
+        for name in ('from', 'to'):
+            try:
+                days[name] = parse_day(request.query_params.get(name))
+            except ValueError:
+                raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+        end = days['to'] or timezone.localdate()
+        start = days['from'] or end - datetime.timedelta(days=config['DEFAULT_DAYS'] - 1)
+        if start > end:
+            raise ValidationError({'from': 'From must not be after to.'})
+        if (end - start).days > config['MAX_BUCKETS'] * 31 or \
+                sum(1 for _ in bucket_starts(start, end, bucket)) > config['MAX_BUCKETS']:
+            raise ValidationError({'from': f"At most {config['MAX_BUCKETS']} buckets per request."})
+
+        series = course_view_timeseries(course_id, start, end, bucket)
+        return Response({
+            'course': course_id,
+            'bucket': bucket,
+            'results': [{'start': day, 'views': views} for day, views in series],
+        })
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def export(self, request):
+        """
+        Admin-only stream of every CourseView as ``?output=ndjson`` (default)
+        or ``csv``, limited to the ``?start=`` and ``?end=`` days (YYYY-MM-DD,
+        inclusive). ``?join=1`` adds the course title and user email.
+        """
+        if request.user.user_type != UserTypeChoices.ADMIN:
+            raise PermissionDenied("Only admins can export course views!!!")
+
+        output = request.query_params.get('output', 'ndjson')
+        if output not in CONTENT_TYPES:
+            raise ValidationError({'output': f"Choose one of {', '.join(CONTENT_TYPES)}."})
+        days = {}
+        for name in ('start', 'end'):
+            try:
+                days[name] = parse_day(request.query_params.get(name))
+            except ValueError:
+                raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+
+        columns, rows = export_rows(join=request.query_params.get('join') in ('1', 'true'), **days)
+        response = StreamingHttpResponse(render(output, columns, rows), content_type=CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="course-views.{output}"'
+        return response
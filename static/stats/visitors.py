@@ -0,0 +1,24 @@
+import uuid
+
+from django.conf import settings
+
+
+def get_visitor_id(request):
+    """
+    Random id of an anonymous browser, taken from its visitor cookie. Only
+    the HyperLogLog hash of it is ever stored. Returns (id, is_new).
+    """
+    visitor_id = request.COOKIES.get(settings.ANONYMOUS_VISITORS['COOKIE_NAME'])
+    if visitor_id and len(visitor_id) == 32:
+        return visitor_id, False
+    return uuid.uuid4().hex, True
+
+
+def set_visitor_cookie(response, visitor_id):
+    response.set_cookie(
+        settings.ANONYMOUS_VISITORS['COOKIE_NAME'],
+        visitor_id,
+        max_age=settings.ANONYMOUS_VISITORS['COOKIE_MAX_AGE'],
+        httponly=True,
+        samesite='Lax',
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TestimonialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'testimonials'
+
+    def ready(self):
+        from static import images
+        images.register(self.get_model('Testimonial'), 'photo', 'photo_variants')
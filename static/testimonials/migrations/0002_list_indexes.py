@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:18
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testimonials', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['-created_at'], name='testimonial_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['owner', '-created_at'], name='testimonial_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(django.db.models.functions.text.Upper('university'), name='testimonial_university_up_idx'),
+        ),
+    ]
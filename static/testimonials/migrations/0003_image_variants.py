@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testimonials', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testimonial',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
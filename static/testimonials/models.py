@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 
 from accounts.models import CustomUser
 
@@ -8,10 +9,20 @@ class Testimonial(models.Model):
     university = models.CharField(max_length=255)
     story = models.TextField()
     photo = models.ImageField(upload_to='testimonials_photos/')
+    # resized copies of photo, see static/images.py
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     video_url = models.URLField(blank=True, null=True)
     country = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='testimonial_created_at_idx'),
+            models.Index(fields=['owner', '-created_at'], name='testimonial_owner_created_idx'),
+            # TestimonialFilter uses iexact, which compares UPPER(column)
+            models.Index(Upper('university'), name='testimonial_university_up_idx'),
+        ]
+
     def __str__(self):
         return f"{self.owner.full_name} - {self.university}"
@@ -1,8 +1,13 @@
 from rest_framework import serializers
 
+from accounts.serializers import UserSummarySerializer
+from static.serializers import DynamicFieldsMixin, ImageVariantsField
 from .models import Testimonial
 
-class TestimonialSerializer(serializers.ModelSerializer):
+class TestimonialSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': (UserSummarySerializer, 'owner')}
+    photo_variants = ImageVariantsField()
+
     class Meta:
         model = Testimonial
         fields = ['id', 
@@ -10,6 +15,7 @@ class TestimonialSerializer(serializers.ModelSerializer):
                   'university', 
                   'story', 
                   'photo', 
+                  'photo_variants',
                   'video_url', 
                   'country', 
                   'created_at', 
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
@@ -7,6 +7,8 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from .models import Testimonial
 from accounts.models import CustomUser
 from accounts.choices import UserTypeChoices
+import os
+import shutil
 import tempfile
 from PIL import Image
 import io
@@ -116,6 +118,43 @@ class TestimonialTests(TestCase):
         self.assertEqual(new_testimonial.owner, self.other_student)
         self.assertTrue(new_testimonial.photo)  # Photo should be populated
         
+    def test_photo_variants_generated_on_upload(self):
+        """Test a PNG photo gets PNG and WebP variants, replaced along with the photo"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        variants_settings = {'WIDTHS': [320, 640, 1280], 'QUALITY': 80, 'WORKERS': 1, 'ASYNC': False}
+
+        def photo(name, size):
+            img_io = io.BytesIO()
+            Image.new('RGBA', size, color=(0, 0, 255, 128)).save(img_io, format='PNG')
+            return SimpleUploadedFile(name, img_io.getvalue(), content_type="image/png")
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(self.other_student_token.access_token)}')
+        data = self.testimonial_data.copy()
+        data['photo'] = photo("portrait.png", (800, 800))
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS=variants_settings):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('testimonial-list'), data, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            testimonial = Testimonial.objects.get(pk=response.data['id'])
+            self.assertEqual(testimonial.photo_variants['source'], testimonial.photo.name)
+            self.assertEqual(sorted(testimonial.photo_variants['png']), ['320', '640'])
+            self.assertEqual(sorted(testimonial.photo_variants['webp']), ['320', '640'])
+            with Image.open(os.path.join(media_root, testimonial.photo_variants['png']['320'])) as variant:
+                self.assertEqual(variant.format, 'PNG')
+                self.assertEqual(variant.size, (320, 320))
+
+            # A smaller photo replaces the variants of the previous one
+            old_variant = os.path.join(media_root, testimonial.photo_variants['webp']['640'])
+            url = reverse('testimonial-detail', kwargs={'pk': testimonial.pk})
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(url, {'photo': photo("small.png", (500, 500))}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            testimonial.refresh_from_db()
+            self.assertEqual(sorted(testimonial.photo_variants['webp']), ['320'])
+            self.assertFalse(os.path.exists(old_variant))
+
     def test_create_testimonial_invalid_data(self):
         """Test testimonial creation with invalid data"""
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(self.student_token.access_token)}')
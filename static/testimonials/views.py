@@ -3,12 +3,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.choices import UserTypeChoices
+from static.views import DynamicFieldsViewMixin
 from .filters import TestimonialFilter
 from .models import Testimonial
 from .serializers import TestimonialSerializer
 
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+class TestimonialViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     permission_classes = (IsAuthenticated,)